@@ -1,25 +1,79 @@
 from textual.app import App
-from textual.widgets import Header, Footer, Checkbox, Select, Input, Button, Collapsible, ContentSwitcher,Static,Label
-from textual.containers import ScrollableContainer , Container, Horizontal
-from widgets import Explanations, Requests, Results, Status, CursoredText # Import modular widgets
-import requests
+from textual.widgets import Header, Footer, Checkbox, Select, Input, Button, Collapsible, ContentSwitcher,Static
+from textual.containers import ScrollableContainer , Container
+from widgets import Explanations, Requests, Results, Status, StatusLog, ResultsList # Import modular widgets
+from fetch import FetchEngine, Response
+from cache import ResponseCache, RestrictionCache
+from routing import RoutingTable
+from inventory import Inventory
+from nodes import NodeList
+from batching import AdaptiveBatcher
+from geocsv import GeoCSVReader, HEADER, format_row, request_body
+from results import parse_rows
+from updates import UpdateBus, StatusMessage, ChannelExtents, RowsParsed, StoredChanged, RestrictionInfo, RequestFinished
+from timeline import TimelineLevels
+from segments import SegmentStore, filter_segments, matches, option_mergegaps, parse_line
 from datetime import datetime, timedelta
 from textual.binding import Binding
 from textual_autocomplete import AutoComplete, Dropdown, DropdownItem
 from textual.app import App, ComposeResult
 from textual import work
 from textual.worker import get_current_worker
-import math
+from functools import partial
+import asyncio
 import os
 import sys
 
+# seconds the availability requests of a node wait for the extents of its channels
+EXTENT_WAIT = 2.0
+
+
 class AvailabilityUI(App):
     def __init__(self, nodes_urls, routing, **kwargs):
         self.nodes_urls = nodes_urls  # Store nodes for later use
+        self.node_list = NodeList()  # Node list kept between sessions, updated in the background
         self.routing = routing  # Store routing URL
+        self.routing_table = RoutingTable(routing)  # Local copy of the routing table, refreshed in the background
+        self.inventory = Inventory()  # Local index of networks, stations, locations and channels for completions
         self.config = kwargs  # Store remaining settings
+        self.fetcher = FetchEngine()  # Shared connection pool for availability requests
+        self.batcher = AdaptiveBatcher()  # Learns how many lines each node answers comfortably in one request
+        self.segments = SegmentStore()  # Segments downloaded so far, so that only what is missing gets requested again
+        self.merging = asyncio.Lock()  # responses are merged into the store one at a time, in a thread
+        self.response_cache = ResponseCache(self.config["default_cache_ttl"], self.config["default_cache_archived_ttl"], self.config["default_cache_size"] * 1024 * 1024)
+        self.restrictions = RestrictionCache(self.config["default_cache_ttl"])  # restriction of the channels seen, also across results
+        # workers post their updates of the user interface, they are applied together once per frame
+        self.updates = UpdateBus(self, {
+            StatusMessage: self.apply_status,
+            ChannelExtents: self.apply_extents,
+            RowsParsed: self.apply_rows,
+            StoredChanged: self.apply_stored,
+            RestrictionInfo: self.apply_restrictions,
+            RequestFinished: self.apply_finished,
+        })
         super().__init__()  
 
+    def on_mount(self) -> None:
+        self.updates.start()
+        for level, dropdown in [("network", "#networks"), ("station", "#stations"), ("location", "#locations"), ("channel", "#channels")]:
+            self.query_one(dropdown).items = partial(self.complete_nslc, level)
+        # downloads wait for the first frame, the networking code is imported with the first of them
+        self.call_after_refresh(self.refresh_in_background)
+
+    def refresh_in_background(self) -> None:
+        """Start the downloads that keep the node list, routing table and inventory up to date"""
+        self.refresh_nodes()
+        if self.routing_table.stale:
+            self.refresh_routing_table()
+        if self.inventory.networks_stale:
+            self.refresh_networks()
+
+    async def on_unmount(self) -> None:
+        await self.fetcher.close()
+        self.batcher.save()
+        self.response_cache.close()
+        self.inventory.save()
+
     def action_quit(self) -> None:
         """Ensure terminal resets properly when quitting."""
         self.exit()
@@ -41,7 +95,11 @@ class AvailabilityUI(App):
         Binding("escape", "cancel_request", "Cancel request", show=False),
     ]
 
-    req_text = ""
+    plain_rows = {}  # rows of the plain view of the NSLC in the results it was opened for
+    pending_rows = {}  # rows of each NSLC that arrived and are not in the segment store yet
+    plain_key = None  # NSLC key of the channel in the plain view
+    timelines = None  # TimelineLevels of the NSLCs in the results
+    patterns = []  # POST line patterns of the current request, selecting the stored channels in the results
 
     def compose(self) -> ComposeResult:
         self.title = "Availability UI"
@@ -49,7 +107,7 @@ class AvailabilityUI(App):
         yield ScrollableContainer(
             Explanations(classes="box hide"),
             Requests(self.nodes_urls, self.config, classes="box"),  # Pass config
-            Collapsible(Status(), title="Status", classes="box", id="status-collapse"),
+            Collapsible(Status(self.config), title="Status", classes="box", id="status-collapse"),
             Results(classes="box", id="results-widget"),
             id="application-container"
         )
@@ -65,6 +123,15 @@ class AvailabilityUI(App):
                 self.query_one("#nodes").select_all()
             else:
                 self.query_one("#nodes").deselect_all()
+        # quality and merge options are applied to the results at once when the segments are filtered locally
+        elif event.checkbox.id in ("qd", "qr", "qq", "qm", "samplerate", "qual", "overlap") and self.timelines is not None and self.config["default_local_filter"]:
+            self.refilter()
+
+    def refilter(self) -> None:
+        """Draw the results again from the segment store, with the quality and merge options of the form"""
+        self.timelines.refilter(self.segment_filter())
+        self.plain_rows = {}
+        self.query_one(ResultsList).redraw()
 
 
     def on_select_changed(self, event: Select.Changed) -> None:
@@ -104,122 +171,224 @@ class AvailabilityUI(App):
             end.value = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
 
 
-    @work(thread=True)
-    def parallel_requests_autocomplete(self, url, data) -> None:
-        worker = get_current_worker()
-        autocomplete = self.query_one("#stations")
-        self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nRetrieving Stations from {url}')
-        r = requests.post(url, data=f'format=text\n{data}')
-        if r.status_code != 200:
-            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[red]Couldn\'t retrieve Stations from {url}[/red]')
-        else:
-            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[green]Retrieved Stations from {url}[/green]')
-            autocomplete.items += [DropdownItem(s.split('|')[1]) for s in r.text.splitlines()[1:]]
-        self.query_one("#status-container").scroll_end()
+    def complete_nslc(self, level, state):
+        """Dropdown items of an NSLC input, from the local inventory"""
+        codes = self.inventory.complete(level, state.value, net=self.query_one("#network").value, sta=self.query_one("#station").value, loc=self.query_one("#location").value)
+        return [DropdownItem(code) for code in codes]
+
+
+    @work(group="inventory")
+    async def refresh_networks(self) -> None:
+        """Fetch the networks of all nodes in the background, for the network completions"""
+        responses = await asyncio.gather(*[self.fetcher.get(f"{url}station/1/query?level=network&format=text") for _, url, _ in self.nodes_urls])
+        codes = {line.split('|')[0] for r in responses if r.status_code == 200 for line in r.text.splitlines() if line and not line.startswith('#')}
+        if codes:
+            self.inventory.add_networks(codes)
+
+
+    @work(group="inventory")
+    async def request_inventory(self, parts, network) -> None:
+        """Fetch channels from the nodes into the local inventory, parts are (node URL, POST lines)
+
+        network is the network the parts fully cover, if any. It is emptied before and only marked
+        as fetched once every part arrived.
+        """
+        if network:
+            # epochs that closed since the last fetch are dropped with the old entries
+            self.inventory.reset_network(network)
+        arrived = await asyncio.gather(*[self.parallel_requests_inventory(url, data) for url, data in parts])
+        if network and all(arrived):
+            self.inventory.network_fetched(network)
+
+    async def parallel_requests_inventory(self, url, data) -> bool:
+        """Fetch channels from a node into the local inventory, returns whether the node answered"""
+        self.show_status(f'Retrieving Channels from {url}')
+        r = await self.fetcher.post(url, f'format=text\nlevel=channel\n{data}')
+        self.batcher.record(url, len(data.splitlines()), r.elapsed, r.size, r.status_code not in (0, 413) and r.status_code < 500)
+        if r.status_code not in (200, 204):
+            self.show_status(f'[red]Couldn\'t retrieve Channels from {url}[/red]')
+            return False
+        self.show_status(f'[green]Retrieved Channels from {url}[/green]')
+        self.inventory.add_channels(line.split('|') for line in r.text.splitlines() if line and not line.startswith('#'))
+        return True
 
 
-    @work(exclusive=True, thread=True)
     def on_input_submitted(self, event: Input.Submitted) -> None:
-        """A function to change status when an NSLC input field is submitted (i.e. is typed and enter is hit)"""
-        # COULD BE ON Change 
-        # keep app responsive while making requests
-        worker = get_current_worker()
-        # for typing network
-        if event.input == self.query_one("#network"):
-            # clear previous results
-            autocomplete = self.query_one("#stations")
-            autocomplete.items = []
-            # get available stations from routing system
-            net = self.query_one('#network').value
-            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nRetrieving routing info from {self.routing}service=station&format=post{"&net="+net if net else ""}')
-            self.query_one("#status-container").scroll_end()
-            r = requests.get(f'{self.routing}service=station&format=post{"&net="+net if net else ""}')
-            if r.status_code != 200:
-                self.call_from_thread(lambda: self.change_button_disabled(False))
-                self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[red]Couldn\'t retrieve routing info from {self.routing}service=station&format=post{"&net="+net if net else ""}[/red]')
-                self.query_one("#status-container").scroll_end()
-            else:
-                self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[green]Retrieved routing info from {self.routing}service=station&format=post{"&net="+net if net else ""}[/green]')
-                self.query_one("#status-container").scroll_end()
-                for line in r.text.splitlines()+['']:
-                    if line.startswith('http'):
-                        data = ''
-                        url = line
-                    elif line == "" and any([url.startswith(node_url) for node_url in self.query_one("#nodes").selected]):
-                        if not worker.is_cancelled:
-                            # execute the requests in parallel and in batches of 150
-                            lines = data.splitlines()
-                            batch_size = 150
-                            for i in range(0, len(lines), batch_size):
-                                batch_data = '\n'.join(lines[i:i+batch_size])
-                                self.parallel_requests_autocomplete(url, batch_data)
-                    else:
-                        data += f"{' '.join(line.split()[:4])} 1800-01-01 2200-12-31\n"
-        # for typing station
-        elif event.input == self.query_one("#station"):
-            # clear previous results
-            autocomplete = self.query_one("#channels")
-            autocomplete.items = []
-            # get available channels from FDSN
-            net = self.query_one('#network').value
-            sta = self.query_one('#station').value
-            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nRetrieving routing info from {self.routing}service=station&format=post{"&net="+net if net else ""}{"&sta="+sta if sta else ""}')
-            self.query_one("#status-container").scroll_end()
-            r = requests.get(f'{self.routing}service=station&format=post{"&net="+net if net else ""}{"&sta="+sta if sta else ""}')
-            if r.status_code != 200:
-                self.call_from_thread(lambda: self.change_button_disabled(False))
-                self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[red]Couldn\'t retrieve routing info from {self.routing}service=station&format=post{"&net="+net if net else ""}{"&sta="+sta if sta else ""}[/red]')
-                self.query_one("#status-container").scroll_end()
-            else:
-                self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[green]Retrieved routing info from {self.routing}service=station&format=json{"&net="+net if net else ""}{"&sta="+sta if sta else ""}[/green]')
-                self.query_one("#status-container").scroll_end()
-                for line in r.text.splitlines()+['']:
-                    if line.startswith('http'):
-                        data = ''
-                        url = line
-                    elif line == "" and any([url.startswith(node_url) for node_url in self.query_one("#nodes").selected]):
-                        self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nRetrieving Channels from {url}')
-                        r = requests.post(url, data=f'format=text\nlevel=channel\n{data}')
-                        if r.status_code != 200:
-                            self.call_from_thread(lambda: self.change_button_disabled(False))
-                            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[red]Couldn\'t retrieve Channels from {url}[/red]')
-                            self.query_one("#status-container").scroll_end()
-                        else:
-                            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[green]Retrieved Channels from {url}[/green]')
-                            self.query_one("#status-container").scroll_end()
-                            autocomplete.items += [DropdownItem(unique) for unique in {c.split('|')[3] for c in r.text.splitlines()[1:]}]
-                    else:
-                        data += f'{line}\n'
-
+        """A function to update the local inventory when a network or station input field is submitted (i.e. is typed and enter is hit)"""
+        # other inputs start no worker, an exclusive one would cancel the inventory update running
+        # an empty input would fetch the channels of all nodes
+        if event.input in (self.query_one("#network"), self.query_one("#station")) and event.value.strip():
+            self.update_inventory(event.input)
 
-    @work(thread=True)
-    def parallel_requests_availability(self, url, data) -> None:
+    @work(exclusive=True, thread=True)
+    def update_inventory(self, submitted) -> None:
+        """Fetch the channels of the submitted network or station input into the local inventory"""
+        # keep app responsive while making requests
         worker = get_current_worker()
+        net = self.query_one('#network').value
+        sta = self.query_one('#station').value if submitted == self.query_one("#station") else ''
+        if self.inventory.fresh(net):
+            # completions are answered from the inventory, nothing to fetch
+            return
+        # a single network is fetched whole, so that any of its stations can be completed locally afterwards
+        network = net.upper() if net and not any(c in net for c in '*?,') else None
+        if network:
+            sta = ''
+        # get channels from FDSN through routing system
+        routes = self.route("station", f'&format=post{"&net="+net if net else ""}{"&sta="+sta if sta else ""}', net=net, sta=sta)
+        if routes is None:
+            self.call_from_thread(lambda: self.change_button_disabled(False))
+        else:
+            parts = []  # (node URL, POST lines) of each request
+            for line in routes.splitlines()+['']:
+                if line.startswith('http'):
+                    data = ''
+                    url = line
+                elif line == "" and any([url.startswith(node_url) for node_url in self.query_one("#nodes").selected]):
+                    # execute the requests in parallel and in batches sized for the node
+                    parts += [(url, '\n'.join(batch)) for batch in self.batcher.batches(url, data.splitlines())]
+                else:
+                    data += f"{' '.join(line.split()[:4])} 1800-01-01 2200-12-31\n"
+            if parts and not worker.is_cancelled:
+                self.call_from_thread(self.request_inventory, parts, network)
+
+
+    def route(self, service, params, **constraints):
+        """Routing info in format=post, resolved locally when the routing table covers the request or else asked to the routing service; None if it couldn't be retrieved"""
+        routes = self.routing_table.resolve(service, **constraints)
+        if routes is not None:
+            self.show_status(f'[green]Resolved routing info for service={service}{params} from local routing table[/green]')
+            return routes
+        self.show_status(f'Retrieving routing info from {self.routing}service={service}{params}')
+        import requests  # only needed when the local routing table can't answer
+        r = requests.get(f'{self.routing}service={service}{params}')
+        if r.status_code != 200:
+            self.show_status(f'[red]Couldn\'t retrieve routing info from {self.routing}service={service}{params}[/red]')
+            return None
+        self.show_status(f'[green]Retrieved routing info from {self.routing}service={service}{params}[/green]')
+        return r.text
+
+    @work(group="nodes")
+    async def refresh_nodes(self) -> None:
+        """Download the live node list in the background and update the nodes to choose from if it changed"""
+        if not await self.node_list.refresh(self.fetcher):
+            return
+        nodes = self.query_one("#nodes")
+        known = {url for _, url, _ in self.nodes_urls}
+        selected = set(nodes.selected)
+        # nodes keep their selection, new nodes are selected along with all the others
+        self.nodes_urls = [(code, url, url in selected or (url not in known and self.query_one("#all-nodes").value)) for code, url in self.node_list.nodes]
+        nodes.clear_options()
+        nodes.add_options(self.nodes_urls)
+        self.show_status('[green]Updated the list of nodes[/green]')
+
+    @work(group="routing")
+    async def refresh_routing_table(self) -> None:
+        """Download the routing table in the background, requests use the routing service until it is ready"""
+        if await self.routing_table.refresh(self.fetcher):
+            self.show_status(f'[green]Updated local routing table from {self.routing}[/green]')
+        else:
+            self.show_status(f'[orange1]Couldn\'t update local routing table from {self.routing}[/orange1]')
+
+    def request_options(self):
+        """The query options (quality, mergegaps, merge, includerestricted) to fetch the segments with
+
+        When the segments are filtered locally, all qualities are fetched unmerged and the choices of
+        the form are applied by segment_filter instead.
+        """
+        quality, mergegaps, merge, restricted = self.form_options()
+        if self.config["default_local_filter"]:
+            return "", mergegaps, "", restricted
+        return quality, mergegaps, merge, restricted
+
+    def segment_filter(self):
+        """Selection and merging of the stored segments by the quality and merge options of the form, None when the query does that"""
+        if not self.config["default_local_filter"]:
+            return None
+        quality, _, merge, _ = self.form_options()
+        return partial(filter_segments, quality=quality, merge=merge, mergegaps=option_mergegaps(self.segments.options))
+
+    def form_options(self):
+        """The query options (quality, mergegaps, merge, includerestricted) chosen in the request form"""
         merge = ",".join([option for option, bool in zip(['samplerate', 'quality', 'overlap'], [self.query_one("#samplerate").value, self.query_one("#qual").value, self.query_one("#overlap").value]) if bool])
         mergegaps = str(self.query_one("#mergegaps").value)
         quality = ",".join([q for q, bool in zip(['D', 'R', 'Q', 'M'], [self.query_one("#qd").value, self.query_one("#qr").value, self.query_one("#qq").value, self.query_one("#qm").value]) if bool])
         restricted = self.query_one("#restricted").value
-        self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nIssuing request to {url}')
-        self.query_one("#status-container").scroll_end()
-        r = requests.post(url, data=f'{"quality="+quality if quality else ""}\n{"mergegaps="+mergegaps if mergegaps else ""}\nformat=geocsv\n{"merge="+merge if merge else ""}\n{"includerestricted=TRUE" if restricted else ""}\n{data}')
+        return quality, mergegaps, merge, restricted
+
+    @work(group="requests")
+    async def parallel_requests_availability(self, url, data) -> None:
+        options = self.segments.options
+        self.show_status(f'Issuing request to {url}')
+        # results are drawn while the response downloads
+        received = {}  # NSLC key -> segments of the response
+        r, cached = await self.post_cached(url, request_body(data, *options), partial(self.show_results, GeoCSVReader(), received))
+        if not cached:
+            self.batcher.record(url, len(data.splitlines()), r.elapsed, r.size, r.status_code not in (0, 413) and r.status_code < 500)
+        if r.status_code in (200, 204) and options == self.segments.options:
+            # the store now knows this part of the windows, timelines are redrawn with what was there before
+            lines = data.splitlines()
+            async with self.merging:
+                changed = await asyncio.to_thread(self.segments.merged, lines, received)
+                if options == self.segments.options:
+                    self.segments.apply(url, lines, changed)
+                    timelines = self.timelines
+                    binned = await asyncio.to_thread(timelines.bin, list(changed))
+                    self.updates.post(StoredChanged(timelines, [window[0] for window in map(parse_line, lines) if window is not None], binned))
+        from_cache = " [b](cached)[/b]" if cached else ""
         if r.status_code == 204:
-            self.call_from_thread(lambda: self.change_button_disabled(False))
-            self.query_one('#status-line').update(f'{self.query_one("#status-line").renderable}\n[red]No data available from {url}[/red]')
-            if "hide" not in self.query_one("#loading").classes:
-                self.query_one("#loading").add_class("hide")
+            self.show_status(f'[red]No data available from {url}{from_cache}[/red]')
         elif r.status_code != 200:
-            self.call_from_thread(lambda: self.change_button_disabled(False))
-            self.query_one('#status-line').update(f'{self.query_one("#status-line").renderable}\n[red]Request to {url} failed. See below for more details[/red]')
-            self.query_one("#error-results").remove_class("hide")
-            self.query_one("#error-results").update(f'[red]{self.query_one("#error-results").renderable}\n{r.text}[/red]')
-            self.query_one("#error-results").scroll_end()
-            if "hide" not in self.query_one("#loading").classes:
-                self.query_one("#loading").add_class("hide")
-        else: 
-            self.query_one('#status-line').update(f'{self.query_one("#status-line").renderable}\n[green]Request to {url} successfully returned data[/green]')
-            self.req_text += f'\n{r.text}'
-            self.call_from_thread(self.show_results, r)
-        self.query_one("#status-container").scroll_end()
+            self.show_status(f'[red]Request to {url} failed. See below for more details[/red]')
+        else:
+            self.show_status(f'[green]Request to {url} successfully returned data{from_cache}[/green]')
+        self.updates.post(RequestFinished(url, r.status_code, r.text, cached))
+
+    def apply_finished(self, events) -> None:
+        if events:
+            self.change_button_disabled(False)
+        for event in events:
+            if event.status_code not in (200, 204):
+                self.query_one("#error-results").remove_class("hide")
+                self.query_one("#error-results").update(f'[red]{self.query_one("#error-results").renderable}\n{event.text}[/red]')
+                self.query_one("#error-results").scroll_end()
+        if "hide" not in self.query_one("#loading").classes:
+            self.query_one("#loading").add_class("hide")
+
+    async def post_cached(self, url, body, on_lines):
+        """POST body to url handing the answer to on_lines, from the response cache when possible
+
+        Returns the response and whether it came from the cache. Fresh 200 and 204 answers are stored in the cache.
+        """
+        cached = await asyncio.to_thread(self.response_cache.get_lines, url, body)
+        if cached is not None:
+            status, lines = cached
+            for i in range(0, len(lines), 5000):
+                await on_lines(lines[i:i+5000])
+            return Response(url, body, status, ""), True
+        compressed = self.response_cache.compressor()
+        if compressed is None:
+            return await self.fetcher.post_lines(url, body, on_lines), False  # the cache is disabled
+        async def keep_lines(lines):
+            # only compressed lines are kept, until the response turns out too big for the cache
+            compressed.add(lines)
+            await on_lines(lines)
+        r = await self.fetcher.post_lines(url, body, keep_lines)
+        if r.status_code in (200, 204):
+            await asyncio.to_thread(self.response_cache.put_lines, url, body, r.status_code, compressed)
+        return r, False
+
+    def show_status(self, message, clear=False) -> None:
+        """Add a line to the status log, after removing the lines shown so far with clear, from any thread"""
+        self.updates.post(StatusMessage(message, clear))
+
+    def apply_status(self, events) -> None:
+        status_log = self.query_one(StatusLog)
+        for event in events:
+            if event.clear:
+                status_log.clear()
+            status_log.add(event.message)
+
     def change_button_disabled(self, disabled: bool) -> None:
         """Enable or disable the button safely in the main thread."""
         try:
@@ -229,7 +398,7 @@ class AvailabilityUI(App):
         except Exception as e:
             print(f"Error: {e}")
 
-    @work(exclusive=True, thread=True)
+    @work(exclusive=True, thread=True, group="send")
     async def on_button_pressed(self, event: Button.Pressed) -> None:
         # Disable the button to prevent multiple clicks
         self.call_from_thread(lambda: self.change_button_disabled(True))
@@ -238,27 +407,23 @@ class AvailabilityUI(App):
             start = self.query_one("#start").value
             end = self.query_one("#end").value
             if not start.strip():
-                self.query_one("#status-line").update("[red]Error: Start time is required![/red]")
+                self.show_status("[red]Error: Start time is required![/red]", clear=True)
                 self.call_from_thread(lambda: self.change_button_disabled(False))
                 return  # Stop execution if invalid
 
             if not end.strip():
-                self.query_one("#status-line").update("[red]Error: End time is required![/red]")
+                self.show_status("[red]Error: End time is required![/red]", clear=True)
                 self.call_from_thread(lambda: self.change_button_disabled(False))
                 return  # Stop execution if invalid
 
 
-            self.query_one("#status-line").update("[green]Sending request...[/green]")
+            self.show_status("[green]Sending request...[/green]", clear=True)
             """A function to send availability request when Send button is clicked"""
             worker = get_current_worker()
             # clear previous results
-            self.req_text = ""
-            if self.query(ContentSwitcher):
-                self.query_one(ContentSwitcher).remove()
-            self.query_one("#error-results").update("")
-            self.query_one("#error-results").add_class("hide")
-            # show loading indicator in results
-            self.query_one("#loading").remove_class("hide")
+            self.call_from_thread(self.clear_results)
+            # segments downloaded with other options can't be reused, the store switches to the ones of these options
+            self.call_from_thread(self.segments.use, self.request_options())
             # build request
             net = self.query_one("#network").value
             sta = self.query_one("#station").value
@@ -269,79 +434,101 @@ class AvailabilityUI(App):
             # request from send button
             if event.button == self.query_one("#request-button"):
                 params = f"&format=post{'&net='+net if net else ''}{'&sta='+sta if sta else ''}{'&loc='+loc if loc else ''}{'&cha='+cha if cha else ''}{'&start='+start if start else ''}{'&end='+end if end else ''}"
-                self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nRetrieving routing info from {self.routing}service=availability{params}')
-                self.query_one("#status-container").scroll_end()
-                r = requests.get(f'{self.routing}service=availability{params}')
-                if r.status_code != 200:
-                    self.call_from_thread(lambda: self.change_button_disabled(False)) 
-                    self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[red]Couldn\'t retrieve routing info from {self.routing}service=availability{params}[/red]')
-                    self.query_one("#status-container").scroll_end()
-                    self.query_one("#loading").add_class("hide")
+                routes = self.route("availability", params, net=net, sta=sta, loc=loc, cha=cha, start=start, end=end)
+                if routes is None:
+                    self.call_from_thread(self.request_done)
                 else:
-                    self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[green]Retrieved routing info from {self.routing}service=availability{params}[/green]')
-                    self.query_one("#status-container").scroll_end()
-                    at_least_one = False
-                    for line in r.text.splitlines()+['']:
+                    blocks = []  # (url, POST lines) of each selected node
+                    for line in routes.splitlines()+['']:
                         if line.startswith('http'):
                             data = ''
                             url = line
                         elif line == "" and any([url.startswith(node_url) for node_url in self.query_one("#nodes").selected]):
-                            if not worker.is_cancelled:
-                                at_least_one = True
-                                # execute the requests in parallel and in batches of 100
-                                lines = data.splitlines()
-                                batch_size = 100
-                                for i in range(0, len(lines), batch_size):
-                                    batch_data = '\n'.join(lines[i:i+batch_size])
-                                    self.parallel_requests_availability(url, batch_data)
+                            blocks.append((url, data.splitlines()))
                         else:
                             data += f'{line}\n'
-                    if not at_least_one:
-                        self.query_one('#status-line').update(f'{self.query_one("#status-line").renderable}\n[red]No data available[/red]')
-                        self.call_from_thread(lambda: self.change_button_disabled(False))
-                        self.query_one("#status-container").scroll_end()
-                        if "hide" not in self.query_one("#loading").classes:
-                            self.query_one("#loading").add_class("hide")
+                    if not blocks:
+                        self.show_status('[red]No data available[/red]')
+                        self.call_from_thread(self.request_done)
+                    else:
+                        self.request_blocks(worker, blocks)
             # request from file button
             elif event.button == self.query_one("#file-button"):
                 filename = self.query_one("#post-file").value
                 if os.path.isfile(filename):
-                    self.query_one('#status-line').update(f'{self.query_one("#status-line").renderable}\nReading NSLC from file {filename}')
-                    self.query_one("#status-container").scroll_end()
-                    data = ''
+                    self.show_status(f'Reading NSLC from file {filename}')
+                    data = []
                     with open(filename, 'r') as f:
                         for l in f.readlines():
                             if '=' not in l:
-                                data += f"{' '.join(l.split()[:4])} {start} {end}\n"
-                    for url in self.query_one("#nodes").selected:
-                        if not worker.is_cancelled:
-                            self.parallel_requests_availability(url+'availability/1/query', data)
+                                data.append(f"{' '.join(l.split()[:4])} {start} {end}")
+                    self.request_blocks(worker, [(url+'availability/1/query', data) for url in self.query_one("#nodes").selected])
             
         
         finally:
             pass
         
 
-    async def show_results(self, r):
-        """The function responsible for drawing and showing the timelines"""
-        csv_results = r.text
-        request = r.request
-        if not self.query(ContentSwitcher):
-            await self.query_one('#results-widget').mount(ContentSwitcher(Container(id="lines"), ScrollableContainer(Static(id="plain"), id="plain-container"), initial="lines"))
-            infoBar = Static("Quality:     Timestamp:                       Trace start:                       Trace end:                    ", id="info-bar")
-            self.query_one('#lines').mount(infoBar)
-            self.query_one('#lines').mount(ScrollableContainer(id="results-container"))
-        num_spans = 130
-        if not self.query_one("#start").value.strip():
-            self.query_one("#status-line").update(
-                f"{self.query_one('#status-line').renderable}\n[orange1]⚠️ Please enter a start date![/orange1]"
-            )
-            return 
-        if not self.query_one("#end").value.strip():
-            self.query_one("#status-line").update(
-                f"{self.query_one('#status-line').renderable}\n[orange1]⚠️ Please enter an end date![/orange1]"
-            )
-            return  # Stop execution if the end date is missing
+    def request_blocks(self, worker, blocks) -> None:
+        """Request from each node only the part of its POST lines that is not in the segment store yet, called from the request thread"""
+        self.call_from_thread(self.draw_stored, [window[0] for url, lines in blocks for window in map(parse_line, lines) if window is not None])
+        at_least_one = False
+        node_lines = {}  # lines of each node, of all its blocks
+        for url, lines in blocks:
+            node_lines.setdefault(url, {}).update(dict.fromkeys(lines))
+        # channels and restrictions of each node, asked once for the whole query with the extent method
+        extent_bodies = []
+        for url, lines in node_lines.items():
+            lines = list(lines)
+            if self.segments.delta(url, lines) or not self.restrictions_known(lines):
+                extent_bodies.append((url, request_body('\n'.join(lines), *self.segments.options)))
+        extent_first = self.config["default_extent_first"]
+        if not extent_first:
+            for url, body in extent_bodies:
+                self.call_from_thread(self.show_restriction, url, body)
+        node_delta = {}  # lines of each node that are not in the store
+        for url, lines in blocks:
+            if worker.is_cancelled:
+                return
+            node_delta.setdefault(url, []).extend(self.segments.delta(url, lines))
+        # no traces arrive for channels served entirely from the store, their extents are not drawn
+        served = []
+        for url, lines in node_lines.items():
+            missing = {window[0] for window in map(parse_line, node_delta[url]) if window is not None}
+            served += [window[0] for window in map(parse_line, lines) if window is not None and window[0] not in missing]
+        if served:
+            self.call_from_thread(lambda: self.query_one(ResultsList).drop_extents(served))
+        extent_bodies = dict(extent_bodies) if extent_first else {}
+        for url, delta in node_delta.items():
+            if delta:
+                at_least_one = True
+                self.call_from_thread(self.request_node, url, delta, extent_bodies.pop(url, None))
+        for url, body in extent_bodies.items():
+            self.call_from_thread(self.request_node, url, [], body)
+        if not at_least_one:
+            self.show_status('[green]All requested data was already downloaded[/green]')
+            self.call_from_thread(self.request_done)
+
+    def request_done(self) -> None:
+        """Enable the send button again and hide the loading indicator, when nothing was requested or the requests were cancelled"""
+        self.change_button_disabled(False)
+        self.query_one("#loading").add_class("hide")
+
+    async def clear_results(self) -> None:
+        """Remove the results and errors of the previous request and show the loading indicator"""
+        self.query_one("#error-results").update("")
+        self.query_one("#error-results").add_class("hide")
+        self.query_one("#loading").remove_class("hide")
+        self.plain_rows = {}
+        self.pending_rows = {}
+        self.plain_key = None
+        self.timelines = None
+        self.patterns = []
+        if self.query(ContentSwitcher):
+            await self.query_one(ContentSwitcher).remove()
+
+    def results_frame(self):
+        """Start and end of the timelines as given in the request form"""
         try:
             start_frame = datetime.strptime(self.query_one("#start").value, "%Y-%m-%dT%H:%M:%S")
         except:
@@ -350,98 +537,238 @@ class AvailabilityUI(App):
             end_frame = datetime.strptime(self.query_one("#end").value, "%Y-%m-%dT%H:%M:%S")
         except:
             end_frame = datetime.strptime(self.query_one("#end").value+"T00:00:00", "%Y-%m-%dT%H:%M:%S")
-        span_frame = (end_frame - start_frame) / num_spans
-        lines = {} # for lines of each nslc, contains line characters
-        infos = {} # for the info-bar of each nslc, contains a list of lists (one inner list for each span) for each channel; inner lists format: [quality/gaps, timestamp, trace_start, trace_end, span_start, span_end]
-        csv_results = csv_results.splitlines()[5:]
-        for row in csv_results:
-            parts = row.split('|')
-            key = f"{parts[0]}_{parts[1]}_{parts[2]}_{parts[3]}"
-            # initialization
-            if key not in lines:
-                lines[key] = [' ' for i in range(num_spans)]
-                infos[key] = [["", "", "", "", "", ""] for i in range(num_spans)]
-                for i in range(num_spans):
-                    infos[key][i][1] = (start_frame+(i+0.5)*span_frame).strftime("%Y-%m-%dT%H:%M:%S")  # timestamp in the middle of each span
-                    infos[key][i][4] = start_frame + i * span_frame
-                    infos[key][i][5] = end_frame if i == num_spans - 1 else start_frame + (i + 1) * span_frame
-            start_trace = datetime.strptime(parts[6], "%Y-%m-%dT%H:%M:%S.%fZ")
-            end_trace = datetime.strptime(parts[7], "%Y-%m-%dT%H:%M:%S.%fZ")
-            first_span = math.floor((start_trace-start_frame) / span_frame)
-            last_span = min(math.ceil((end_trace-start_frame) / span_frame), num_spans)
-            for i in range(first_span, last_span):
-                if lines[key][i] == ' ':
-                    char = '━'
-                    if i == first_span and infos[key][i][4] < start_trace:
-                        char = '┗'
-                    elif i == last_span - 1 and end_trace < infos[key][i][5]:
-                        char = '┛'
-                    if parts[4] == 'D':
-                        lines[key][i] = f'[orange1]{char}[/orange1]'
-                        infos[key][i] = ['D', infos[key][i][1], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), end_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
-                    elif parts[4] == 'R':
-                        lines[key][i] = f'[green1]{char}[/green1]'
-                        infos[key][i] = ['R', infos[key][i][1], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), end_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
-                    elif parts[4] == 'Q':
-                        lines[key][i] = f'[orchid]{char}[/orchid]'
-                        infos[key][i] = ['Q', infos[key][i][1], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), end_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
-                    elif parts[4] == 'M':
-                        lines[key][i] = f'[turquoise4]{char}[/turquoise4]'
-                        infos[key][i] = ['M', infos[key][i][1], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), end_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
-                elif any(c in lines[key][i] for c in ['━', '┗', '┛']):
-                    lines[key][i] = '╌'
-                    # start of gap is the end of previously found trace in this span and end of gap is the start of the new trace
-                    infos[key][i] = ['1', infos[key][i][1], infos[key][i][3], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
-                elif lines[key][i] == '╌' or lines[key][i] == '┄':
-                    lines[key][i] = '┄'
-                    # start of gaps is the start of the first gap in this span and end is the start of the new trace
-                    infos[key][i] = [str(int(infos[key][i][0])+1), infos[key][i][1], infos[key][i][2], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
-        # longest possible label to align start of lines
-        longest_label = 26
-        for k in lines:
-            infos[k].append(("", "", "", "", "", "")) # because cursor can go one character after the end of the input
-            # add infos in long gaps
-            # switched off because leads to O(num_spans*num_channels*len(csv_results)) complexity and makes app too slow for long availability output
-            #for i in range(num_spans):
-                #if lines[k][i] == ' ':
-                    # long gap starts after the latest of the traces that exist before the current span
-                    #infos[k][i][2] = max([datetime.strptime(row.split('|')[7], "%Y-%m-%dT%H:%M:%S.%fZ") for row in csv_results if datetime.strptime(row.split('|')[7], "%Y-%m-%dT%H:%M:%S.%fZ") < datetime.strptime(infos[k][i][1], "%Y-%m-%dT%H:%M:%S")] + [start_frame])
-                    #infos[k][i][2] = infos[k][i][2].strftime("%Y-%m-%dT%H:%M:%S")
-                    # long gap ends before the earliest of the traces that exist after the current span
-                    #infos[k][i][3] = min([datetime.strptime(row.split('|')[6], "%Y-%m-%dT%H:%M:%S.%fZ") for row in csv_results if datetime.strptime(row.split('|')[6], "%Y-%m-%dT%H:%M:%S.%fZ") > datetime.strptime(infos[k][i][1], "%Y-%m-%dT%H:%M:%S")] + [end_frame])
-                    #infos[k][i][3] = infos[k][i][3].strftime("%Y-%m-%dT%H:%M:%S")
-            # add line in results
-            await self.query_one('#results-container').mount(Horizontal(Label(f"{k} ┄{' '*(longest_label-len(k))}"), CursoredText(value=''.join(lines[k]), info=infos[k], id=f"_{k}"), classes="result-item"))
-        if self.query(CursoredText):
-            self.query(CursoredText)[0].focus()
-        if "hide" not in self.query_one("#loading").classes:
-            self.query_one("#loading").add_class("hide")
-        # show restrictions info for each channel using /extent method of availability webservice
-        self.show_restriction(request)
-
+        return start_frame, end_frame
 
+    async def mount_results(self) -> None:
+        if self.timelines is None:
+            # the number of spans is corrected by the results list once it knows its width
+            self.timelines = TimelineLevels(self.segments, *self.results_frame(), ResultsList.fitting_spans(self.query_one('#results-widget').content_size.width - 2), self.segment_filter())
+            await self.query_one('#results-widget').mount(ContentSwitcher(Container(id="lines"), ScrollableContainer(Static(id="plain"), id="plain-container"), initial="lines"))
+            infoBar = Static("Quality:     Timestamp:                       Trace start:                       Trace end:                    ", id="info-bar")
+            self.query_one('#lines').mount(infoBar)
+            results = ResultsList(self.timelines, id="results-container")
+            results.restricted = self.restrictions.known()
+            self.query_one('#lines').mount(results)
+
+    async def mount_timelines(self, keys) -> None:
+        """Add a line in the results for each of the NSLC keys"""
+        results = self.query_one(ResultsList)
+        first = not results.keys
+        results.add_lines(keys)
+        # focus the first line as soon as there is one
+        if keys and first:
+            results.focus_line(keys[0])
+            if "hide" not in self.query_one("#loading").classes:
+                self.query_one("#loading").add_class("hide")
 
-    @work(thread=True)
-    def show_restriction(self, request):
-        """A function for showing whether a channel is restricted or not"""
-        worker = get_current_worker()
-        new_url = request.url.replace("query", "extent")
-        old_body = request.body.split('\n')
+    async def draw_stored(self, patterns, binned=()) -> None:
+        """Draw the timelines of the stored channels selected by the POST line patterns, their plain rows are taken from the store again
+
+        binned are (level, timelines) already binned from the store in a thread, they are used instead of binning them again.
+        """
+        self.patterns = list(dict.fromkeys(self.patterns + patterns))
+        await self.mount_results()
+        new_keys = []
+        results = self.query_one(ResultsList)
+        for k in self.segments.keys(patterns):
+            self.timelines.forget(k)
+            self.plain_rows.pop(k, None)
+            self.pending_rows.pop(k, None)
+            if k in results.rows:
+                results.update_line(k)
+            else:
+                new_keys.append(k)
+        for level, timelines in binned:
+            self.timelines.install(level, timelines)
+        await self.mount_timelines(new_keys)
+
+    def plain_rows_of(self, key):
+        """Rows of the plain view of a channel, the stored segments clipped to the window and the rows that arrived since
+
+        They are only built when the plain view of the channel is opened.
+        """
+        if key not in self.plain_rows:
+            start_frame, end_frame = self.timelines.start_frame, self.timelines.end_frame
+            self.plain_rows[key] = [format_row(key, max(s[0], start_frame), min(s[1], end_frame), s[2], s[3]) for s in self.timelines.segments(key) if s[1] > start_frame and s[0] < end_frame]
+            self.plain_rows[key].extend(self.pending_rows.get(key, []))
+        return self.plain_rows[key]
+
+    def plain_text(self, key):
+        """The plain view of a channel, in the format of the availability query output"""
+        return '\n' + HEADER + ''.join('\n' + row for row in self.plain_rows_of(key))
+
+    def zoom(self, start_frame, end_frame) -> bool:
+        """Show the results for another window, returns whether they were drawn from the segment store
+
+        The window is copied to the request form. When part of it was never fetched, or its spans are
+        shorter than the mergegaps the segments were fetched with, it is requested like with the send
+        button instead, asking for segments merged at most over a span. Zooming back out goes back to
+        the coarser segments the store kept, so only what they miss of the window is fetched.
+        """
+        span = (end_frame - start_frame) / self.timelines.num_spans
+        if span < timedelta(seconds=1):
+            return False
+        self.query_one("#start").value = start_frame.strftime("%Y-%m-%dT%H:%M:%S")
+        self.query_one("#end").value = end_frame.strftime("%Y-%m-%dT%H:%M:%S")
+        mergegaps = option_mergegaps(self.segments.options)
+        coarser = [gaps for gaps in self.segments.coarser() if float(gaps) <= span.total_seconds()]
+        if coarser:
+            self.query_one("#mergegaps").value = max(coarser, key=float)
+            self.action_send_button()
+            return False
+        fetched = [(url, pattern) for url, pattern in self.segments.coverage if pattern in self.patterns]
+        if span.total_seconds() < mergegaps or not fetched or any(self.segments.missing(url, pattern, start_frame, end_frame) for url, pattern in fetched):
+            if span.total_seconds() < mergegaps:
+                self.query_one("#mergegaps").value = str(float(int(span.total_seconds())))
+            self.action_send_button()
+            return False
+        self.timelines.use(start_frame, end_frame, self.timelines.num_spans)
+        self.query_one(ResultsList).redraw()
+        self.plain_rows = {}
+        return True
+
+    async def show_results(self, reader, received, lines):
+        """The function responsible for drawing and showing the timelines, called with each part of a response as soon as it arrives"""
+        await self.mount_results()
+        if not self.query_one("#start").value.strip():
+            self.show_status("[orange1]⚠️ Please enter a start date![/orange1]")
+            return 
+        if not self.query_one("#end").value.strip():
+            self.show_status("[orange1]⚠️ Please enter an end date![/orange1]")
+            return  # Stop execution if the end date is missing
+        # parsing and binning run in a worker thread, drawing the parsed rows is all that is left here
+        timelines = self.timelines
+        level = timelines.level
+        parsed = await asyncio.to_thread(parse_rows, reader, lines, level, timelines.filter)
+        if self.timelines is not timelines:
+            return  # results were cleared for a new request meanwhile
+        for rows in parsed:
+            received.setdefault(rows.key, []).extend(rows.segments)
+        self.updates.post(RowsParsed(timelines, level, parsed))
+
+    async def apply_rows(self, events) -> None:
+        """Draw the parsed parts of responses that arrived during the last frame"""
+        results = self.query_one(ResultsList)
+        new_keys = {} # channels seen for the first time, to be mounted
+        changed_keys = {} # channels already shown that got more traces, to be redrawn
+        for event in events:
+            if event.timelines is not self.timelines:
+                continue  # results were cleared for a new request meanwhile
+            for rows in event.parsed:
+                if rows.key not in results.rows:
+                    new_keys[rows.key] = True
+                else:
+                    changed_keys[rows.key] = True
+                self.timelines.add_rows(rows, event.level)
+                self.pending_rows.setdefault(rows.key, []).extend(rows.lines)
+                if rows.key in self.plain_rows:
+                    self.plain_rows[rows.key].extend(rows.lines)
+        for k in changed_keys:
+            results.update_line(k)
+        await self.mount_timelines(list(new_keys))
+
+    async def apply_stored(self, events) -> None:
+        # drawn after the rows of the same frame, which are in the store already
+        events = [event for event in events if event.timelines is self.timelines]
+        patterns = [pattern for event in events for pattern in event.patterns]
+        if patterns:
+            await self.draw_stored(patterns, [event.binned for event in events])
+            self.query_one(ResultsList).drop_extents(patterns)
+
+    def apply_restrictions(self, events) -> None:
+        restrictions = {}
+        for event in events:
+            restrictions.update(event.restrictions)
+        self.restrictions.update(restrictions)
+        if self.timelines is not None:
+            self.query_one(ResultsList).set_restrictions(restrictions)
+
+    async def apply_extents(self, events) -> None:
+        for event in events:
+            if event.timelines is self.timelines:
+                results = self.query_one(ResultsList)
+                results.set_extents(event.extents)
+                await self.mount_timelines([k for k in event.extents if k not in results.rows])
+
+    def restrictions_known(self, lines) -> bool:
+        """Whether the restriction of every stored channel selected by the POST lines is still known"""
+        keys = list(self.segments.keys([window[0] for window in map(parse_line, lines) if window is not None]))
+        return len(self.restrictions.known(keys)) == len(keys)
+
+
+    @work(group="requests")
+    async def show_restriction(self, url, body):
+        """Show whether the channels of the POST body are restricted"""
+        extents = await self.fetch_extent(url, body)
+        if extents is not None:
+            self.updates.post(RestrictionInfo({key: extent[0] for key, extent in extents.items()}))
+
+    @work(group="requests")
+    async def request_node(self, url, lines, extent_body) -> None:
+        """Request the POST lines from the node in batches
+
+        Given the body of an extent request, the channels of the node are drawn from its answer
+        first and the lines selecting channels in view are asked for first. The batches wait for
+        that answer at most EXTENT_WAIT seconds, a slow node only delays its own requests.
+        """
+        in_view = []
+        if extent_body is not None:
+            extents = asyncio.ensure_future(self.show_extents(url, extent_body))
+            try:
+                in_view = await asyncio.wait_for(asyncio.shield(extents), EXTENT_WAIT)
+            except asyncio.TimeoutError:
+                pass
+        if in_view:
+            lines = sorted(lines, key=lambda line: not any(matches(key, ' '.join(line.split()[:4])) for key in in_view))
+        # execute the requests in parallel and in batches sized for the node
+        for batch in self.batcher.batches(url, lines):
+            self.parallel_requests_availability(url, '\n'.join(batch))
+
+    async def show_extents(self, url, body):
+        """Draw a line for every channel of the POST body of the node, from the extents of their data
+
+        Their traces are drawn once they arrive. Returns the NSLC keys of the lines in view.
+        """
+        timelines = self.timelines
+        extents = await self.fetch_extent(url, body) or {}
+        if self.timelines is not timelines:
+            return []  # results were cleared for a new request meanwhile
+        self.updates.post(RestrictionInfo({key: extent[0] for key, extent in extents.items()}))
+        self.updates.post(ChannelExtents(timelines, {key: extent[1:] for key, extent in extents.items()}))
+        results = self.query_one(ResultsList)
+        keys = results.keys + [key for key in extents if key not in results.rows]
+        return keys[results.scroll_offset.y:results.scroll_offset.y + results.size.height]
+
+    async def fetch_extent(self, url, body):
+        """Ask the extent method of the node instead of query for the POST body
+
+        Returns NSLC key -> (restricted, earliest, latest), None when the request failed.
+        """
+        new_url = url.replace("query", "extent")
+        old_body = body.split('\n')
         filtered = [row for row in old_body if "mergegaps" not in row]
         new_body = '\n'.join(filtered)
-        self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\nRetrieving restrictions info from {new_url}')
-        r = requests.post(new_url, data=new_body)
+        self.show_status(f'Retrieving restrictions info from {new_url}')
+        cached = await asyncio.to_thread(self.response_cache.get, new_url, new_body)
+        if cached is not None:
+            r = Response(new_url, new_body, cached[0], cached[1])
+        else:
+            r = await self.fetcher.post(new_url, new_body)
+            if r.status_code == 200:
+                await asyncio.to_thread(self.response_cache.put, new_url, new_body, r.status_code, r.text)
         if r.status_code == 200:
-            self.call_from_thread(lambda: self.change_button_disabled(False))
-            self.query_one("#status-line").update(f'{self.query_one("#status-line").renderable}\n[green]Retrieved restrictions info from {new_url}[/green]')
+            self.show_status(f'[green]Retrieved restrictions info from {new_url}{" [b](cached)[/b]" if cached else ""}[/green]')
+            extents = {}  # a channel has a row per quality and sample rate, it is restricted if any of them is
             for line in r.text.splitlines()[5:]:
                 parts = line.split('|')
-                nslc = f"{parts[0]}_{parts[1]}_{parts[2]}_{parts[3]}"
-                label_item = self.query_one(f"#_{nslc}").parent.query_one(Label)
-                if parts[10] == "RESTRICTED":
-                    label_item.update(f"{label_item.renderable[:len(nslc)+1]}[red1][b]R[/b][/red1]{label_item.renderable[len(nslc)+2:]}")
+                key = f"{parts[0]}_{parts[1]}_{parts[2]}_{parts[3]}"
+                earliest, latest = datetime.fromisoformat(parts[6].rstrip('Z')), datetime.fromisoformat(parts[7].rstrip('Z'))
+                if key in extents:
+                    extents[key] = (extents[key][0] or parts[10] == "RESTRICTED", min(extents[key][1], earliest), max(extents[key][2], latest))
                 else:
-                    label_item.update(f"{label_item.renderable[:len(nslc)+1]} {label_item.renderable[len(nslc)+2:]}")
+                    extents[key] = (parts[10] == "RESTRICTED", earliest, latest)
+            return extents
+        return None
 
 
     def action_toggle_help(self) -> None:
@@ -454,46 +781,39 @@ class AvailabilityUI(App):
 
     def action_cancel_request(self) -> None:
         """An action for the user to cancel requests (if for example they take too much time)"""
-        self.workers.cancel_all()
+        # background downloads of nodes, routes and inventory go on
+        self.workers.cancel_group(self, "send")
+        self.workers.cancel_group(self, "requests")
+        self.request_done()
 
 
     def action_first_line(self) -> None:
         """An action to move focus to the first line"""
-        if self.query(CursoredText):
-            self.query(CursoredText)[0].focus()
+        if self.query(ResultsList) and self.query_one(ResultsList).keys:
+            self.query_one(ResultsList).move_to(0)
+            self.query_one(ResultsList).focus()
 
 
     def action_last_line(self) -> None:
         """An action to move focus to the last line"""
-        if self.query(CursoredText):
-            self.query(CursoredText)[-1].focus()
+        if self.query(ResultsList) and self.query_one(ResultsList).keys:
+            self.query_one(ResultsList).move_to(len(self.query_one(ResultsList).keys) - 1)
+            self.query_one(ResultsList).focus()
             self.query_one("#application-container").scroll_end()
 
 
+    def show_plain(self, key) -> None:
+        """Switch to the plain view of a channel, its line gets the focus back when the view is left"""
+        self.plain_key = key
+        self.query_one(ContentSwitcher).current = "plain-container"
+        self.query_one("#plain").update(self.plain_text(key))
+
     def action_lines_view(self) -> None:
         if self.query(ContentSwitcher) and self.query_one(ContentSwitcher).current == "plain-container":
             self.query_one(ContentSwitcher).current = "lines"
-            nslc_to_focus = '_'.join(str(self.query_one("#plain").renderable).splitlines()[-1].split('|')[:4])
-            self.query_one(f"#_{nslc_to_focus}").focus()
+            self.query_one(ResultsList).focus_line(self.plain_key)
 
 
     def action_send_button(self) -> None:
         """An action equivalent to pressing send button"""
         self.on_button_pressed(Button.Pressed(button=self.query_one("#request-button")))
-
-
-    def next_line(self):
-        self.action_focus_next()
-        if self.focused not in self.query(CursoredText):
-            self.query(CursoredText)[-1].focus()
-            # below line does not have effect because focus turns out to happen after below line is executed
-            #self.query(CursoredText)[-1].action_end()
-
-
-    def previous_line(self):
-        self.action_focus_previous()
-        if self.focused not in self.query(CursoredText):
-            self.query(CursoredText)[0].focus()
-        else:
-            # below line does not have effect because focus turns out to happen after below line is executed
-            self.query(CursoredText)[0].action_end()
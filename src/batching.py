@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from paths import cache_dir
+
+# batch size used for a node that has never answered before
+DEFAULT_BATCH = 100
+MIN_BATCH = 10
+MAX_BATCH = 2000
+# aim for requests that take about this many seconds to answer
+TARGET_SECONDS = 10.0
+# and whose answer does not exceed this many bytes
+TARGET_BYTES = 20 * 1024 * 1024
+# a batch can at most double or halve from one request to the next
+MAX_STEP = 2.0
+# weight of the newest response in the running averages
+ALPHA = 0.3
+
+
+class NodeStats:
+    """Running averages learned from the responses of one node"""
+
+    def __init__(self, batch=DEFAULT_BATCH, rate=0.0, latency=0.0, bytes_per_line=0.0, error_rate=0.0):
+        self.batch = batch  # lines to send in the next request
+        self.rate = rate  # lines answered per second
+        self.latency = latency  # seconds per request
+        self.bytes_per_line = bytes_per_line  # size of the answer per line sent
+        self.error_rate = error_rate  # fraction of failed requests
+
+    def as_dict(self):
+        return vars(self)
+
+
+class AdaptiveBatcher:
+    """Chooses how many POST lines to send in one request to each node
+
+    Every response updates the node's throughput, latency, answer size and error rate. The next
+    batch is sized so that a request takes about TARGET_SECONDS and stays below TARGET_BYTES,
+    and it is halved whenever a request to the node fails or times out.
+    What was learned is stored in the cache directory, so that a new session starts well sized.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "batching.json")
+        self.nodes = {}
+        self._lock = threading.Lock()  # autocomplete requests report from worker threads
+        try:
+            with open(self.path, "r") as f:
+                self.nodes = {url: NodeStats(**stats) for url, stats in json.load(f).items()}
+        except (OSError, ValueError, TypeError):
+            pass  # start from scratch if state is missing or unreadable
+
+    def batch_size(self, url) -> int:
+        stats = self.nodes.get(url)
+        return stats.batch if stats else DEFAULT_BATCH
+
+    def batches(self, url, lines):
+        """Split POST lines in batches sized for the node at url"""
+        size = self.batch_size(url)
+        for i in range(0, len(lines), size):
+            yield lines[i:i+size]
+
+    def record(self, url, lines, elapsed, size, ok) -> None:
+        """Learn from a response of url to a request of so many lines"""
+        with self._lock:
+            stats = self.nodes.setdefault(url, NodeStats())
+            stats.error_rate += ALPHA * ((0.0 if ok else 1.0) - stats.error_rate)
+            if not ok:
+                stats.batch = max(MIN_BATCH, int(stats.batch / MAX_STEP))
+                return
+            elapsed = max(elapsed, 0.001)
+            stats.rate = lines / elapsed if not stats.rate else stats.rate + ALPHA * (lines / elapsed - stats.rate)
+            stats.latency = elapsed if not stats.latency else stats.latency + ALPHA * (elapsed - stats.latency)
+            stats.bytes_per_line = size / lines if not stats.bytes_per_line else stats.bytes_per_line + ALPHA * (size / lines - stats.bytes_per_line)
+            wanted = stats.rate * TARGET_SECONDS
+            if stats.bytes_per_line:
+                wanted = min(wanted, TARGET_BYTES / stats.bytes_per_line)
+            # only grow while the node has been answering reliably
+            if stats.error_rate > 0.2:
+                wanted = min(wanted, stats.batch)
+            # a small batch that answered quickly says little about how big batches behave
+            if lines < stats.batch and wanted > stats.batch:
+                wanted = stats.batch
+            wanted = min(max(wanted, stats.batch / MAX_STEP), stats.batch * MAX_STEP)
+            stats.batch = int(min(max(wanted, MIN_BATCH), MAX_BATCH))
+
+    def save(self) -> None:
+        with self._lock:
+            try:
+                with open(self.path, "w") as f:
+                    json.dump({url: stats.as_dict() for url, stats in self.nodes.items()}, f, indent=1)
+            except OSError:
+                pass  # learned state is only an optimization
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from paths import cache_dir
+
+# windows that ended longer ago than this are considered archived and are kept for the archived TTL
+ARCHIVED_AFTER = timedelta(days=2)
+
+# part of the cache a single response may take, so that one large answer does not push out all the others
+ENTRY_SHARE = 4
+
+
+def normalize_body(body):
+    """POST body with blank lines and whitespace differences removed and lines sorted, so that equivalent requests share an entry"""
+    lines = {' '.join(line.split()) for line in body.splitlines() if line.strip()}
+    return '\n'.join(sorted(lines))
+
+
+def window_end(body):
+    """Latest end time among the NSLC lines of a POST body, None if any of them is open ended or unparsable"""
+    latest = None
+    for line in body.splitlines():
+        parts = line.split()
+        if '=' in line or len(parts) < 6:
+            continue
+        try:
+            end = datetime.fromisoformat(parts[5].rstrip('Z'))
+        except ValueError:
+            return None
+        latest = end if latest is None or end > latest else latest
+    return latest
+
+
+class ResponseCache:
+    """SQLite cache of webservice responses, keyed by URL and normalized POST body
+
+    Entries expire after ttl seconds, or after archived_ttl seconds when the requested time window
+    lies entirely in the past. When the stored bodies exceed max_bytes the least recently used
+    entries are dropped, bodies larger than max_entry are not stored at all. A max_bytes of 0
+    disables the cache. get and put can be called from several threads, they take turns on the
+    connection.
+    """
+
+    def __init__(self, ttl, archived_ttl, max_bytes, path=None):
+        self.ttl = ttl
+        self.archived_ttl = archived_ttl
+        self.max_bytes = max_bytes
+        self.max_entry = max_bytes // ENTRY_SHARE
+        self.db = None
+        self.lock = threading.Lock()
+        if max_bytes <= 0:
+            return
+        try:
+            self.db = sqlite3.connect(path or os.path.join(cache_dir(), "responses.sqlite"), check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, status INTEGER, body BLOB, size INTEGER, expires REAL, accessed REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self.db.commit()
+        except sqlite3.Error:
+            self.db = None  # run without cache rather than not at all
+
+    @staticmethod
+    def key(url, body):
+        return hashlib.sha256(f"{url}\n{normalize_body(body)}".encode()).hexdigest()
+
+    def get(self, url, body):
+        """Return (status, text) of a fresh cached response, or None"""
+        row = self._get(url, body)
+        try:
+            return None if row is None else (row[0], zlib.decompress(row[1]).decode())
+        except (zlib.error, UnicodeDecodeError):
+            return None
+
+    def get_lines(self, url, body):
+        """Return (status, lines) of a fresh cached response, or None
+
+        The body is decompressed and split a megabyte at a time, a thread running this leaves
+        the others their turns.
+        """
+        row = self._get(url, body)
+        if row is None:
+            return None
+        lines = []
+        rest = b''
+        decompressor = zlib.decompressobj()
+        try:
+            data = row[1]
+            while data:
+                chunk = rest + decompressor.decompress(data, 1 << 20)
+                data = decompressor.unconsumed_tail
+                chunk, _, rest = chunk.rpartition(b'\n')
+                lines += chunk.decode().splitlines()
+            lines += (rest + decompressor.flush()).decode().splitlines()
+        except (zlib.error, UnicodeDecodeError):
+            return None
+        return row[0], lines
+
+    def _get(self, url, body):
+        """Status and compressed body of a fresh cached response, or None"""
+        if self.db is None:
+            return None
+        key = self.key(url, body)
+        with self.lock:
+            return self._select(key)
+
+    def _select(self, key):
+        if self.db is None:
+            return None  # closed meanwhile
+        try:
+            row = self.db.execute("SELECT status, body, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[2] < now:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            return row[0], row[1]
+        except sqlite3.Error:
+            return None
+
+    def put(self, url, body, status, text) -> None:
+        if self.db is None:
+            return
+        self.put_compressed(url, body, status, zlib.compress(text.encode(), 1))
+
+    def compressor(self):
+        """A CompressedLines to hand the lines of a response to as they arrive, None when the cache is disabled"""
+        return None if self.db is None else CompressedLines(self.max_entry)
+
+    def put_lines(self, url, body, status, lines) -> None:
+        """Store the lines given to a CompressedLines, unless they became too big"""
+        data = lines.finish()
+        if data is not None:
+            self.put_compressed(url, body, status, data)
+
+    def put_compressed(self, url, body, status, data) -> None:
+        if self.db is None or len(data) > self.max_entry:
+            return
+        end = window_end(body)
+        archived = end is not None and end < datetime.now() - ARCHIVED_AFTER
+        now = time.time()
+        with self.lock:
+            self._insert((self.key(url, body), url, status, data, len(data), now + (self.archived_ttl if archived else self.ttl), now))
+
+    def _insert(self, row) -> None:
+        if self.db is None:
+            return  # closed meanwhile
+        try:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self.evict()
+            self.db.commit()
+        except sqlite3.Error:
+            pass
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones until the cache fits in max_bytes"""
+        self.db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        drop = []
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            drop.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self.db.executemany("DELETE FROM responses WHERE key = ?", drop)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+
+class CompressedLines:
+    """The lines of a response compressed as they arrive, for ResponseCache.put_lines
+
+    Only the compressed data is kept. Once it exceeds limit bytes it is dropped and later lines
+    are ignored, so a response too big for the cache costs no memory.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.compressor = zlib.compressobj(1)
+        self.parts = []
+        self.size = 0
+
+    def add(self, lines) -> None:
+        if self.parts is None:
+            return
+        part = self.compressor.compress(''.join(line + '\n' for line in lines).encode())
+        self.size += len(part)
+        if self.size > self.limit:
+            self.compressor, self.parts = None, None
+        elif part:
+            self.parts.append(part)
+
+    def finish(self):
+        """The compressed lines, None when they exceeded the limit"""
+        if self.parts is None:
+            return None
+        data = b''.join(self.parts) + self.compressor.flush()
+        self.compressor, self.parts = None, None
+        return data if len(data) <= self.limit else None
+
+
+class RestrictionCache:
+    """Whether the data of each NSLC is restricted, as told by the extent method, kept in memory for ttl seconds
+
+    Lines of later results get their restriction mark as soon as they are drawn, and the extent
+    method is only asked again for channels that are not known.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}  # NSLC key -> (restricted, expiry time)
+
+    def update(self, restrictions) -> None:
+        expires = time.time() + self.ttl
+        for key, restricted in restrictions.items():
+            self.entries[key] = (restricted, expires)
+
+    def known(self, keys=None) -> dict:
+        """NSLC key -> restricted of the fresh entries, of all of them or of the given keys"""
+        now = time.time()
+        if keys is None:
+            return {key: restricted for key, (restricted, expires) in self.entries.items() if expires >= now}
+        return {key: self.entries[key][0] for key in keys if key in self.entries and self.entries[key][1] >= now}
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+# how many connections are kept open towards a single node
+CONNECTIONS_PER_NODE = 8
+# how many connections are kept open in total
+CONNECTIONS_TOTAL = 64
+# seconds an idle connection stays in the pool waiting to be reused
+KEEPALIVE_TIMEOUT = 60
+# seconds after which a request is abandoned
+REQUEST_TIMEOUT = 600
+
+
+class Response:
+    """The parts of an HTTP response that the application uses"""
+
+    def __init__(self, url, body, status_code, text, elapsed=0.0, size=None):
+        self.url = url
+        self.body = body
+        self.status_code = status_code  # 0 when the request never got an HTTP answer
+        self.text = text
+        self.elapsed = elapsed  # seconds from sending the request until the whole body was read
+        self.size = len(text) if size is None else size  # bytes of the body, also when it was streamed
+
+
+class FetchEngine:
+    """One shared aiohttp session for all requests to the EIDA nodes
+
+    Connections are pooled and kept alive, so consecutive batches to the same node reuse the
+    same TLS connection instead of doing a new handshake each time. The number of connections
+    per node is limited, extra requests wait in the pool queue for a free connection.
+    """
+
+    def __init__(self, per_node=CONNECTIONS_PER_NODE, total=CONNECTIONS_TOTAL, keepalive=KEEPALIVE_TIMEOUT, timeout=REQUEST_TIMEOUT):
+        self.per_node = per_node
+        self.total = total
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._session = None
+        self._slots = {}  # one semaphore per node, so that elapsed times do not include waiting for a connection
+
+    @property
+    def session(self):
+        """The session is created on first use, because it has to be bound to the running event loop
+
+        aiohttp is imported here as well, it takes longer to import than the rest of the application.
+        """
+        import aiohttp
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.total, limit_per_host=self.per_node, keepalive_timeout=self.keepalive)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def get(self, url) -> Response:
+        return await self._request("GET", url)
+
+    async def post(self, url, data) -> Response:
+        return await self._request("POST", url, data)
+
+    def _slot(self, url) -> asyncio.Semaphore:
+        node = urlsplit(url).netloc
+        if node not in self._slots:
+            self._slots[node] = asyncio.Semaphore(self.per_node)
+        return self._slots[node]
+
+    async def post_lines(self, url, data, on_lines) -> Response:
+        """Like post, but a successful body is not kept in the response
+
+        It is handed to the coroutine on_lines a list of lines at a time, as soon as each part of it
+        has been downloaded. Time spent in on_lines is not counted in the elapsed time.
+        """
+        import aiohttp
+        async with self._slot(url):
+            started = time.monotonic()
+            busy = 0.0
+            try:
+                async with self.session.post(url, data=data) as r:
+                    if r.status != 200:
+                        text = await r.text()
+                        return Response(url, data, r.status, text, time.monotonic() - started)
+                    size = 0
+                    rest = b""
+                    async for chunk in r.content.iter_any():
+                        size += len(chunk)
+                        # only complete lines are handed over, the unfinished last one waits for the next chunk
+                        parts = (rest + chunk).rsplit(b"\n", 1)
+                        if len(parts) == 1:
+                            rest = parts[0]
+                            continue
+                        rest = parts[1]
+                        callback_started = time.monotonic()
+                        await on_lines(parts[0].decode(errors="replace").splitlines())
+                        busy += time.monotonic() - callback_started
+                    if rest:
+                        await on_lines(rest.decode(errors="replace").splitlines())
+                    return Response(url, data, r.status, "", time.monotonic() - started - busy, size)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return Response(url, data, 0, f"{type(e).__name__}: {e}", time.monotonic() - started - busy)
+
+    async def _request(self, method, url, data=None) -> Response:
+        import aiohttp
+        async with self._slot(url):
+            started = time.monotonic()
+            try:
+                async with self.session.request(method, url, data=data) as r:
+                    text = await r.text()
+                    return Response(url, data, r.status, text, time.monotonic() - started)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return Response(url, data, 0, f"{type(e).__name__}: {e}", time.monotonic() - started)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._slots = {}
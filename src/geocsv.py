@@ -0,0 +1,44 @@
+# comment lines and column names of the availability query output
+HEADER = """#dataset: GeoCSV 2.0
+#delimiter: |
+#field_unit: unitless|unitless|unitless|unitless|unitless|hertz|ISO_8601|ISO_8601
+#field_type: string|string|string|string|string|float|datetime|datetime
+Network|Station|Location|Channel|Quality|SampleRate|Earliest|Latest"""
+
+
+def parse_times(values):
+    """Parse a list of timestamps of the Earliest/Latest columns at once, into a numpy datetime64 array"""
+    import numpy as np
+    return np.array([value.rstrip('Z') for value in values], dtype='datetime64[us]')
+
+
+def request_body(data, quality, mergegaps, merge, restricted):
+    """Body of a POST request to the availability query method for the POST lines in data, asking for GeoCSV output"""
+    return f'{"quality="+quality if quality else ""}\n{"mergegaps="+mergegaps if mergegaps else ""}\nformat=geocsv\n{"merge="+merge if merge else ""}\n{"includerestricted=TRUE" if restricted else ""}\n{data}'
+
+
+def format_row(key, start, end, quality, samplerate):
+    """A row of the availability query output for a segment of the NSLC key"""
+    return f"{key.replace('_', '|')}|{quality}|{samplerate}|{start.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}|{end.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}"
+
+
+class GeoCSVReader:
+    """Incremental reader for the GeoCSV output of the availability webservice
+
+    A response can be fed to it in any number of pieces, as long as each piece is a list of
+    complete lines. Comment lines and the column names are skipped, rows are returned split
+    in their columns.
+    """
+
+    def __init__(self):
+        self.columns = None  # column names, once the header line has been read
+
+    def rows(self, lines):
+        for line in lines:
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('|')
+            if self.columns is None:
+                self.columns = parts
+                continue
+            yield parts
@@ -0,0 +1,180 @@
+import json
+import os
+import time
+from fnmatch import fnmatchcase
+from paths import cache_dir
+
+# seconds after which the stations and channels of a network are fetched again
+NETWORK_TTL = 7 * 24 * 3600
+# seconds after which the list of networks is fetched again
+NETWORKS_TTL = 7 * 24 * 3600
+# most completions returned for one input
+LIMIT = 200
+
+
+class PrefixTrie:
+    """Set of codes answering prefix completions, where the prefix may contain the ? and * wildcards"""
+
+    def __init__(self, words=()):
+        self.root = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word) -> None:
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True  # end of a word, codes never contain an empty character
+
+    def complete(self, prefix, limit=LIMIT):
+        """Sorted words starting with something prefix matches"""
+        found = {}
+        self._match(self.root, prefix, 0, '', found, limit)
+        return sorted(found)
+
+    def _match(self, node, prefix, i, word, found, limit) -> None:
+        if len(found) >= limit:
+            return
+        if i == len(prefix):
+            self._collect(node, word, found, limit)
+            return
+        char = prefix[i]
+        if char == '*':
+            # either the star matches nothing more, or it swallows one more character
+            self._match(node, prefix, i + 1, word, found, limit)
+            for c in sorted(node):
+                if c:
+                    self._match(node[c], prefix, i, word + c, found, limit)
+        elif char == '?':
+            for c in sorted(node):
+                if c:
+                    self._match(node[c], prefix, i + 1, word + c, found, limit)
+        elif char in node:
+            self._match(node[char], prefix, i + 1, word + char, found, limit)
+
+    def _collect(self, node, word, found, limit) -> None:
+        if len(found) >= limit:
+            return
+        if '' in node:
+            found[word] = True
+        for c in sorted(node):
+            if c:
+                self._collect(node[c], word + c, found, limit)
+
+
+class Inventory:
+    """Local index of the networks, stations, locations and channels of the nodes
+
+    It is stored in the cache directory and refreshed one network at a time, when a network that
+    was never fetched or was fetched more than NETWORK_TTL ago is typed in.
+    Locations are kept as "--" when empty.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "inventory.json")
+        self.networks_fetched = 0.0  # time the list of networks was fetched
+        self.networks = {}  # network -> {"fetched": time its channels were fetched, "stations": {station: {location: [channels]}}}
+        self.dirty = False
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            self.networks_fetched = saved["networks_fetched"]
+            self.networks = saved["networks"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self._tries = {}  # tries are built on first use and dropped when their codes change
+
+    @property
+    def networks_stale(self) -> bool:
+        return time.time() - self.networks_fetched > NETWORKS_TTL
+
+    def fresh(self, net) -> bool:
+        """Whether all channels of network net are known and recent enough"""
+        if not net or ',' in net or '*' in net or '?' in net:
+            return False
+        return time.time() - self.networks.get(net.upper(), {}).get("fetched", 0) <= NETWORK_TTL
+
+    def add_networks(self, codes) -> None:
+        for net in codes:
+            self.networks.setdefault(net, {"fetched": 0, "stations": {}})
+        self.networks_fetched = time.time()
+        self._tries.pop("networks", None)
+        self.dirty = True
+
+    def reset_network(self, net) -> None:
+        """Forget the stations of network net before all of them are fetched again"""
+        self.networks[net] = {"fetched": 0, "stations": {}}
+        self._tries.pop(net, None)
+        self._tries.pop("networks", None)
+        self.dirty = True
+
+    def network_fetched(self, net) -> None:
+        """Mark network net as fresh, once the rows of all its stations were added"""
+        self.networks.setdefault(net, {"fetched": 0, "stations": {}})["fetched"] = time.time()
+        self._tries.pop("networks", None)
+        self.dirty = True
+
+    def add_channels(self, rows) -> None:
+        """Add rows of level=channel text output"""
+        for parts in rows:
+            if len(parts) < 4:
+                continue
+            network = self.networks.setdefault(parts[0], {"fetched": 0, "stations": {}})
+            channels = network["stations"].setdefault(parts[1], {}).setdefault(parts[2] or '--', [])
+            if parts[3] not in channels:
+                channels.append(parts[3])
+            self._tries.pop(parts[0], None)
+        self.dirty = True
+
+    def _trie(self, net):
+        """Tries of the network codes, or of the station, location and channel codes of one network"""
+        if net not in self._tries:
+            if net == "networks":
+                self._tries[net] = PrefixTrie(self.networks)
+            else:
+                stations = self.networks[net]["stations"]
+                self._tries[net] = {
+                    "stations": PrefixTrie(stations),
+                    "locations": PrefixTrie({loc for locs in stations.values() for loc in locs}),
+                    "channels": PrefixTrie({cha for locs in stations.values() for chas in locs.values() for cha in chas}),
+                }
+        return self._tries[net]
+
+    def _matching(self, code, pattern):
+        return not pattern or any(fnmatchcase(code, p) for p in pattern.split(','))
+
+    def complete(self, level, value, net='', sta='', loc=''):
+        """Codes of level ("network", "station", "location" or "channel") completing value, within the other NSLC inputs"""
+        value = value.split(',')[-1].upper()
+        if level == "network":
+            return self._trie("networks").complete(value)
+        nets = [n for n in self.networks if self._matching(n, net.upper())] if net else list(self.networks)
+        found = set()
+        for n in nets:
+            stations = self.networks[n]["stations"]
+            if not stations:
+                continue
+            if level == "station":
+                found.update(self._trie(n)["stations"].complete(value))
+            elif sta and not any(c in sta for c in '*?,') and sta.upper() in stations:
+                # a single station is small enough to be filtered directly
+                locs = stations[sta.upper()]
+                if level == "location":
+                    found.update(l for l in locs if fnmatchcase(l, value + '*'))
+                else:
+                    found.update(c for l, chas in locs.items() if self._matching(l, loc.upper()) for c in chas if fnmatchcase(c, value + '*'))
+            else:
+                found.update(self._trie(n)["locations" if level == "location" else "channels"].complete(value))
+            if len(found) >= LIMIT:
+                break
+        return sorted(found)[:LIMIT]
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"networks_fetched": self.networks_fetched, "networks": self.networks}, f)
+            self.dirty = False
+        except OSError:
+            pass
@@ -1,10 +1,12 @@
 import argparse
-import requests
 import os
+import sys
 import logging
 import tomli
 from datetime import datetime, timedelta
-from app import AvailabilityUI  # Import the main UI application
+from nodes import NodeList
+
+ROUTING = "https://www.orfeus-eu.org/eidaws/routing/1/query?"
 
 
 def parse_arguments():
@@ -12,37 +14,30 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Availability UI application")
     parser.add_argument("-p", "--post", default=None, help="Default file path for POST requests")
     parser.add_argument("-c", "--config", default=None, help="Configuration file path")
+    commands = parser.add_subparsers(dest="command")
+    # same options as the request form, the ones not given come from the configuration file
+    report = commands.add_parser("report", help="Write the availability of the requested channels to a file, without user interface")
+    report.add_argument("-p", "--post", default=argparse.SUPPRESS, help="File with NSLC lines to request from every node, instead of the NSLC options")
+    report.add_argument("-c", "--config", default=argparse.SUPPRESS, help="Configuration file path")
+    report.add_argument("--net", default="", help="Network code(s)")
+    report.add_argument("--sta", default="", help="Station code(s)")
+    report.add_argument("--loc", default="", help="Location code(s)")
+    report.add_argument("--cha", default="", help="Channel code(s)")
+    report.add_argument("--start", default=None, help="Start time, YYYY-MM-DDTHH:MM:SS")
+    report.add_argument("--end", default=None, help="End time, YYYY-MM-DDTHH:MM:SS")
+    report.add_argument("--quality", default=None, help="Comma separated quality codes, e.g. D,R")
+    report.add_argument("--mergegaps", default=None, help="Gaps shorter than this many seconds are ignored")
+    report.add_argument("--merge", default=None, help="Comma separated merge options among samplerate, quality and overlap")
+    report.add_argument("--restricted", default=None, action=argparse.BooleanOptionalAction, help="Include restricted data")
+    report.add_argument("--nodes", default=None, help="Comma separated codes of the nodes to ask, all of them by default")
+    report.add_argument("-f", "--format", default="csv", choices=["csv", "json"], help="Output format")
+    report.add_argument("-o", "--output", default=None, help="Output file, standard output by default")
     return parser.parse_args()
 
 
 def load_nodes():
-    """Fetch node URLs dynamically or use fallback values if request fails."""
-    nodes_urls = []
-    try:
-        response = requests.get("https://orfeus-eu.org/epb/nodes", timeout=5)
-        if response.status_code == 200:
-            nodes_urls = [(n["node_code"], f"https://{n['node_url_base']}/fdsnws/", True) for n in response.json()]
-    except requests.RequestException:
-        pass  # Fall back to default nodes if request fails
-
-    # Fallback nodes
-    if not nodes_urls:
-        nodes_urls = [
-            ("GFZ", "https://geofon.gfz-potsdam.de/fdsnws/", True),
-            ("ODC", "https://orfeus-eu.org/fdsnws/", True),
-            ("ETHZ", "https://eida.ethz.ch/fdsnws/", True),
-            ("RESIF", "https://ws.resif.fr/fdsnws/", True),
-            ("INGV", "https://webservices.ingv.it/fdsnws/", True),
-            ("LMU", "https://erde.geophysik.uni-muenchen.de/fdsnws/", True),
-            ("ICGC", "https://ws.icgc.cat/fdsnws/", True),
-            ("NOA", "https://eida.gein.noa.gr/fdsnws/", True),
-            ("BGR", "https://eida.bgr.de/fdsnws/", True),
-            ("BGS", "https://eida.bgs.ac.uk/fdsnws/", True),
-            ("NIEP", "https://eida-sc3.infp.ro/fdsnws/", True),
-            ("KOERI", "https://eida.koeri.boun.edu.tr/fdsnws/", True),
-            ("UIB-NORSAR", "https://eida.geo.uib.no/fdsnws/", True),
-        ]
-    return nodes_urls
+    """Node URLs from the last downloaded node list or the fallback values, the live list is fetched by the application once it runs."""
+    return [(code, url, True) for code, url in NodeList().nodes]
 
 
 def load_defaults():
@@ -60,6 +55,13 @@ def load_defaults():
         "default_merge_quality": False,
         "default_merge_overlap": True,
         "default_includerestricted": True,
+        "default_cache_ttl": 3600,
+        "default_cache_archived_ttl": 30 * 24 * 3600,
+        "default_cache_size": 200,
+        "default_status_lines": 1000,
+        "default_status_log": None,
+        "default_extent_first": True,
+        "default_local_filter": False,
     }
 
 
@@ -136,12 +138,66 @@ def load_config(config_path, defaults):
     if "includerestricted" in config:
         defaults["default_includerestricted"] = bool(config["includerestricted"])
 
+    # Handle response cache settings
+    for option in ["cache_ttl", "cache_archived_ttl", "cache_size"]:
+        if option in config:
+            if not isinstance(config[option], int) or config[option] < 0:
+                raise ValueError(f"Invalid {option} in {config_path}")
+            defaults[f"default_{option}"] = config[option]
+
+    # Handle status log settings
+    if "status_lines" in config:
+        if not isinstance(config["status_lines"], int) or config["status_lines"] < 1:
+            raise ValueError(f"Invalid status_lines in {config_path}")
+        defaults["default_status_lines"] = config["status_lines"]
+    if "status_log" in config:
+        if not isinstance(config["status_log"], str):
+            raise ValueError(f"Invalid status_log in {config_path}")
+        defaults["default_status_log"] = os.path.expanduser(config["status_log"])
+
+    # Handle drawing the channels from their extents first
+    if "extent_first" in config:
+        defaults["default_extent_first"] = bool(config["extent_first"])
+
+    # Handle filtering the segments by quality and merge options locally
+    if "local_filter" in config:
+        defaults["default_local_filter"] = bool(config["local_filter"])
+
     return defaults  # Return updated defaults
 
 
 
 
-if __name__ == "__main__":
+def run_report(args, defaults):
+    """Run the report subcommand, returns the exit status"""
+    import asyncio
+    from report import Report
+    quality = args.quality if args.quality is not None else ",".join(q for q in ["D", "R", "Q", "M"] if defaults[f"default_quality_{q}"])
+    mergegaps = args.mergegaps if args.mergegaps is not None else defaults["default_mergegaps"]
+    merge = args.merge if args.merge is not None else ",".join(m for m in ["samplerate", "quality", "overlap"] if defaults[f"default_merge_{m}"])
+    restricted = args.restricted if args.restricted is not None else defaults["default_includerestricted"]
+    start = args.start or defaults["default_starttime"]
+    end = args.end or defaults["default_endtime"]
+    nodes_urls = [(code, url) for code, url, _ in load_nodes()]
+    if args.nodes:
+        codes = [code.strip().upper() for code in args.nodes.split(",")]
+        unknown = [code for code in codes if code not in {known.upper() for known, _ in nodes_urls}]
+        if unknown:
+            print(f"Unknown node codes: {', '.join(unknown)} (known: {', '.join(code for code, _ in nodes_urls)})", file=sys.stderr)
+            return 2
+        nodes_urls = [(code, url) for code, url in nodes_urls if code.upper() in codes]
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        report = Report(nodes_urls, ROUTING, (quality, mergegaps, merge, restricted), out, args.format)
+        if defaults["default_file"]:
+            return asyncio.run(report.run_file(defaults["default_file"], start, end))
+        return asyncio.run(report.run_query(args.net, args.sta, args.loc, args.cha, start, end))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def main():
     # Parse command-line arguments
     args = parse_arguments()
 
@@ -154,7 +210,13 @@ if __name__ == "__main__":
     # Load configuration from file (if provided)
     defaults["default_file"] = args.post  # Overwrite default POST file if provided
     defaults = load_config(args.config, defaults)
-    routing = "https://www.orfeus-eu.org/eidaws/routing/1/query?"
+    routing = ROUTING
+
+    if args.command == "report":
+        sys.exit(run_report(args, defaults))
+
+    # textual is imported only now, so that argument and configuration errors show up at once
+    from app import AvailabilityUI
 
     # Run the application with loaded settings
     app = AvailabilityUI(
@@ -163,3 +225,7 @@ if __name__ == "__main__":
         **defaults  # Pass unpacked defaults
     )
     app.run()
+
+
+if __name__ == "__main__":
+    main()
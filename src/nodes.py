@@ -0,0 +1,64 @@
+import json
+import os
+import time
+from paths import cache_dir
+
+# list of the EIDA nodes and their services
+NODES_URL = "https://orfeus-eu.org/epb/nodes"
+# nodes offered when no list has been downloaded yet
+FALLBACK_NODES = [
+    ("GFZ", "https://geofon.gfz-potsdam.de/fdsnws/"),
+    ("ODC", "https://orfeus-eu.org/fdsnws/"),
+    ("ETHZ", "https://eida.ethz.ch/fdsnws/"),
+    ("RESIF", "https://ws.resif.fr/fdsnws/"),
+    ("INGV", "https://webservices.ingv.it/fdsnws/"),
+    ("LMU", "https://erde.geophysik.uni-muenchen.de/fdsnws/"),
+    ("ICGC", "https://ws.icgc.cat/fdsnws/"),
+    ("NOA", "https://eida.gein.noa.gr/fdsnws/"),
+    ("BGR", "https://eida.bgr.de/fdsnws/"),
+    ("BGS", "https://eida.bgs.ac.uk/fdsnws/"),
+    ("NIEP", "https://eida-sc3.infp.ro/fdsnws/"),
+    ("KOERI", "https://eida.koeri.boun.edu.tr/fdsnws/"),
+    ("UIB-NORSAR", "https://eida.geo.uib.no/fdsnws/"),
+]
+
+
+class NodeList:
+    """The EIDA nodes to choose from, as downloaded last time or else the built-in list
+
+    Loading never touches the network, the live list is downloaded with refresh once the
+    application is running.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "nodes.json")
+        self.fetched = 0.0  # time the list was downloaded, 0 for the built-in list
+        self.nodes = list(FALLBACK_NODES)  # (code, fdsnws base URL)
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            if saved["nodes"]:
+                self.fetched = saved["fetched"]
+                self.nodes = [(code, url) for code, url in saved["nodes"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # keep the built-in list
+
+    async def refresh(self, fetcher) -> bool:
+        """Download the node list and store it, returns whether the nodes changed"""
+        r = await fetcher.get(NODES_URL)
+        if r.status_code != 200:
+            return False
+        try:
+            nodes = [(n["node_code"], f"https://{n['node_url_base']}/fdsnws/") for n in json.loads(r.text)]
+        except (ValueError, KeyError, TypeError):
+            return False
+        if not nodes:
+            return False
+        changed = nodes != self.nodes
+        self.fetched, self.nodes = time.time(), nodes
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"fetched": self.fetched, "nodes": self.nodes}, f)
+        except OSError:
+            pass
+        return changed
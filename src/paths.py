@@ -0,0 +1,9 @@
+import os
+
+
+def cache_dir():
+    """Directory where the application keeps state between sessions, created if missing"""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "a10y")
+    os.makedirs(path, exist_ok=True)
+    return path
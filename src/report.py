@@ -0,0 +1,128 @@
+import asyncio
+import csv
+import json
+import sys
+from batching import AdaptiveBatcher
+from fetch import FetchEngine
+from geocsv import GeoCSVReader, request_body
+from routing import RoutingTable
+
+# output columns, in the order of the availability query output
+COLUMNS = ["network", "station", "location", "channel", "quality", "samplerate", "earliest", "latest"]
+
+
+class CSVWriter:
+    def __init__(self, out):
+        self.writer = csv.writer(out, lineterminator="\n")
+        self.writer.writerow(COLUMNS)
+
+    def write(self, parts):
+        self.writer.writerow(parts[:8])
+
+    def close(self):
+        pass
+
+
+class JSONWriter:
+    """Writes a JSON array one object at a time, so that nothing has to be kept in memory"""
+
+    def __init__(self, out):
+        self.out = out
+        self.first = True
+        self.out.write("[")
+
+    def write(self, parts):
+        row = dict(zip(COLUMNS, parts))
+        try:
+            row["samplerate"] = float(row["samplerate"])
+        except (KeyError, ValueError):
+            pass
+        self.out.write(("\n" if self.first else ",\n") + json.dumps(row))
+        self.first = False
+
+    def close(self):
+        self.out.write("\n]\n")
+
+
+WRITERS = {"csv": CSVWriter, "json": JSONWriter}
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+class Report:
+    """Availability of the requested channels written to a file, without the user interface
+
+    Takes the same options as the request form. Routes are resolved like in the application,
+    then every batch is requested at once from its node and each row is written out as soon
+    as its part of the response arrives.
+    """
+
+    def __init__(self, nodes_urls, routing, options, out, output_format="csv"):
+        self.nodes_urls = nodes_urls  # (code, url) of the nodes to ask
+        self.routing = routing
+        self.options = options  # (quality, mergegaps, merge, includerestricted) as in the request form
+        self.writer = WRITERS[output_format](out)
+        self.out = out
+        self.fetcher = FetchEngine()
+        self.batcher = AdaptiveBatcher()
+        self.routing_table = RoutingTable(routing)
+        self.failed = 0  # requests that returned an error
+
+    async def route(self, net, sta, loc, cha, start, end):
+        """(url, POST lines) of each selected node for the request, None if routing failed"""
+        routes = self.routing_table.resolve("availability", net=net, sta=sta, loc=loc, cha=cha, start=start, end=end)
+        if routes is None:
+            params = f"&format=post{'&net='+net if net else ''}{'&sta='+sta if sta else ''}{'&loc='+loc if loc else ''}{'&cha='+cha if cha else ''}{'&start='+start if start else ''}{'&end='+end if end else ''}"
+            r = await self.fetcher.get(f"{self.routing}service=availability{params}")
+            if r.status_code == 204:
+                return []
+            if r.status_code != 200:
+                log(f"Couldn't retrieve routing info from {self.routing}service=availability{params}")
+                return None
+            routes = r.text
+        blocks = []
+        for block in routes.split("\n\n"):
+            lines = [line for line in block.splitlines() if line]
+            if lines and any(lines[0].startswith(url) for _, url in self.nodes_urls):
+                blocks.append((lines[0], lines[1:]))
+        return blocks
+
+    async def request(self, url, data):
+        reader = GeoCSVReader()
+        async def write_rows(lines):
+            for parts in reader.rows(lines):
+                self.writer.write(parts)
+        r = await self.fetcher.post_lines(url, request_body(data, *self.options), write_rows)
+        self.batcher.record(url, len(data.splitlines()), r.elapsed, r.size, r.status_code not in (0, 413) and r.status_code < 500)
+        if r.status_code not in (200, 204):
+            self.failed += 1
+            log(f"Request to {url} failed: {r.status_code} {r.text.strip()}")
+
+    async def run(self, blocks) -> int:
+        """Request every (url, POST lines) block and write the rows, returns the exit status"""
+        try:
+            await asyncio.gather(*[self.request(url, '\n'.join(batch)) for url, lines in blocks for batch in self.batcher.batches(url, lines)])
+        finally:
+            self.writer.close()
+            self.out.flush()
+            await self.fetcher.close()
+            self.batcher.save()
+        return 1 if self.failed else 0
+
+    async def run_query(self, net, sta, loc, cha, start, end) -> int:
+        blocks = await self.route(net, sta, loc, cha, start, end)
+        if blocks is None:
+            await self.fetcher.close()
+            return 2
+        return await self.run(blocks)
+
+    async def run_file(self, filename, start, end) -> int:
+        """Like the file button, the NSLC lines of the file are asked to every selected node"""
+        data = []
+        with open(filename, 'r') as f:
+            for l in f.readlines():
+                if '=' not in l and l.strip():
+                    data.append(f"{' '.join(l.split()[:4])} {start} {end}")
+        return await self.run([(url + 'availability/1/query', data) for _, url in self.nodes_urls])
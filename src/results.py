@@ -0,0 +1,42 @@
+from collections import namedtuple
+from geocsv import format_row, parse_times
+from timeline import bin_traces
+
+# the rows of one channel in a part of a response: NSLC key, their columns, the rows as text for
+# the plain view, the segments (start, end, quality, samplerate) for the segment store, and their
+# traces binned for a level of the timelines (TraceBins or None)
+ChannelRows = namedtuple("ChannelRows", "key qualities samplerates starts ends lines segments bins")
+
+
+def parse_rows(reader, lines, level, filter=None):
+    """Parse a part of a response and bin its traces for the timelines at level (start_frame, end_frame, num_spans)
+
+    Runs in a worker thread, so that the UI only has to draw the result. Returns a tuple with
+    a ChannelRows for each channel in the part, in order of appearance, which is not changed
+    afterwards. Only the GeoCSVReader of the response is used by the thread, one part at a time.
+    With the filter of the timelines, the segments are kept as they are for the store, but only
+    the ones it returns are binned and shown as rows.
+    """
+    rows = {}  # columns of the rows of each channel, binned together
+    for parts in reader.rows(lines):
+        key = f"{parts[0]}_{parts[1]}_{parts[2]}_{parts[3]}"
+        if key not in rows:
+            rows[key] = ([], [], [], [], [])
+        columns = rows[key]
+        columns[0].append(parts[4])
+        columns[1].append(parts[5])
+        columns[2].append(parts[6])
+        columns[3].append(parts[7])
+        columns[4].append('|'.join(parts))
+    parsed = []
+    for key, (qualities, samplerates, starts, ends, texts) in rows.items():
+        starts, ends = parse_times(starts), parse_times(ends)
+        segments = list(zip(starts.astype(object), ends.astype(object), qualities, samplerates))
+        if filter is not None:
+            import numpy as np
+            drawn = filter(sorted(segments, key=lambda segment: segment[0]))
+            qualities, samplerates = [s[2] for s in drawn], [s[3] for s in drawn]
+            starts, ends = np.array([s[0] for s in drawn], dtype='datetime64[us]'), np.array([s[1] for s in drawn], dtype='datetime64[us]')
+            texts = [format_row(key, *segment) for segment in drawn]
+        parsed.append(ChannelRows(key, qualities, samplerates, starts, ends, texts, segments, bin_traces(*level, qualities, starts, ends)))
+    return tuple(parsed)
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from datetime import datetime
+from fnmatch import fnmatchcase
+from paths import cache_dir
+
+# services whose routes are kept locally
+SERVICES = ["availability", "station"]
+# seconds after which the local routing table is downloaded again
+REFRESH_AFTER = 24 * 3600
+# end time written for routes that are still open
+OPEN_END = "2200-12-31T00:00:00"
+
+
+def parse_time(value):
+    """Parse a time of the routing service or of the request inputs, None when empty"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError:
+        return None
+
+
+def has_wildcard(value):
+    return '*' in value or '?' in value
+
+
+def intersect(query, route):
+    """The more specific of two NSLC codes that can match the same channels, None if they cannot"""
+    if not has_wildcard(route):
+        return route if fnmatchcase(route, query) else None
+    if not has_wildcard(query):
+        return query if fnmatchcase(query, route) else None
+    # both are patterns, let the node sort out which channels match
+    return query if route == '*' else route if query == '*' else query
+
+
+class RoutingTable:
+    """Local copy of the EIDA routing table, indexed by network
+
+    Requests are resolved in-process into the same format=post text the routing service returns.
+    A miss, i.e. a table that is not loaded yet or has no route for a request, is reported as None
+    so that the caller can ask the routing service itself.
+    """
+
+    def __init__(self, routing, path=None):
+        self.routing = routing  # routing service URL, ending in "query?"
+        self.path = path or os.path.join(cache_dir(), "routing.json")
+        self.fetched = 0.0  # time the table was downloaded
+        self.urls = []  # distinct service URLs, routes refer to them by index
+        self.index = {}  # service -> network code or pattern -> list of (sta, loc, cha, start, end, url index, priority)
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            self.build(saved["fetched"], saved["services"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # table is downloaded in the background
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched > REFRESH_AFTER
+
+    def build(self, fetched, services) -> None:
+        """Index the routes of each service, as returned by the routing service in json format"""
+        urls = []
+        url_index = {}
+        index = {}
+        for service, entries in services.items():
+            by_network = index.setdefault(service, {})
+            for entry in entries:
+                url = entry["url"]
+                if url not in url_index:
+                    url_index[url] = len(urls)
+                    urls.append(url)
+                for p in entry.get("params", []):
+                    route = (p.get("sta") or '*', p.get("loc") or '*', p.get("cha") or '*', parse_time(p.get("start")), parse_time(p.get("end")), url_index[url], p.get("priority", 1))
+                    by_network.setdefault(p.get("net") or '*', []).append(route)
+        self.fetched, self.urls, self.index = fetched, urls, index
+
+    async def refresh(self, fetcher) -> bool:
+        """Download the routing table of every service and store it, keeping the current one if anything fails"""
+        services = {}
+        for service in SERVICES:
+            r = await fetcher.get(f"{self.routing}service={service}&format=json")
+            if r.status_code != 200:
+                return False
+            try:
+                services[service] = json.loads(r.text)
+            except ValueError:
+                return False
+        self.build(time.time(), services)
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"fetched": self.fetched, "services": services}, f)
+        except OSError:
+            pass
+        return True
+
+    def resolve(self, service, net='', sta='', loc='', cha='', start='', end=''):
+        """Routes of a request in the format=post of the routing service, None on a miss"""
+        if service not in self.index:
+            return None
+        query_start = parse_time(start)
+        query_end = parse_time(end)
+        by_network = self.index[service]
+        routed = {}  # url index -> POST lines, in the order they are found
+        for n in (net or '*').split(','):
+            candidates = [(code, route) for code in ([n, '*'] if not has_wildcard(n) else by_network) for route in by_network.get(code, [])]
+            for s in (sta or '*').split(','):
+                for l in (loc or '*').split(','):
+                    for c in (cha or '*').split(','):
+                        matches = []
+                        for code, (r_sta, r_loc, r_cha, r_start, r_end, url, priority) in candidates:
+                            codes = [intersect(q, r) for q, r in ((n, code), (s, r_sta), (l.replace('--', ''), r_loc.replace('--', '')), (c, r_cha))]
+                            if None in codes:
+                                continue
+                            if (r_end is not None and query_start is not None and query_start >= r_end) or (query_end is not None and r_start is not None and query_end <= r_start):
+                                continue
+                            line_start = max(t for t in (query_start, r_start) if t is not None) if query_start or r_start else None
+                            line_end = min(t for t in (query_end, r_end) if t is not None) if query_end or r_end else None
+                            codes[2] = codes[2] or '--'
+                            matches.append((' '.join(codes), priority, url, f"{' '.join(codes)} {line_start.strftime('%Y-%m-%dT%H:%M:%S') if line_start else '1800-01-01T00:00:00'} {line_end.strftime('%Y-%m-%dT%H:%M:%S') if line_end else OPEN_END}"))
+                        # the best priority is chosen for each stream, a wildcard can select streams of several networks
+                        best = {}
+                        for stream, priority, url, line in matches:
+                            best[stream] = min(priority, best.get(stream, priority))
+                        for stream, priority, url, line in matches:
+                            if priority == best[stream] and line not in routed.setdefault(url, []):
+                                routed[url].append(line)
+        if not routed:
+            return None
+        return '\n'.join(f"{self.urls[url]}\n" + '\n'.join(lines) + '\n' for url, lines in routed.items())
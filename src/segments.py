@@ -0,0 +1,205 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# data of the last minutes is possibly still arriving at the nodes, so that part of a window is fetched again next time
+SETTLE = timedelta(minutes=10)
+
+# sets of query options whose segments are kept, like the coarse ones of a window while zoomed in
+KEPT_OPTIONS = 4
+
+
+def parse_line(line):
+    """Split a POST line in its NSLC pattern and time window, None if it has no valid window"""
+    parts = line.split()
+    try:
+        return ' '.join(parts[:4]), datetime.fromisoformat(parts[4].rstrip('Z')), datetime.fromisoformat(parts[5].rstrip('Z'))
+    except (IndexError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def pattern_regex(pattern):
+    """Regular expression matching the NSLC keys (NET_STA_LOC_CHA) selected by a POST line pattern (NET STA LOC CHA)"""
+    codes = [re.escape(p.replace('--', '')).replace(r'\*', '[^_]*').replace(r'\?', '[^_]') for p in pattern.split()]
+    return re.compile('_'.join(codes) + '$')
+
+
+def matches(key, pattern):
+    return pattern_regex(pattern).match(key) is not None
+
+
+def option_mergegaps(options):
+    """mergegaps of a set of query options in seconds, 0 when there is none"""
+    try:
+        return float(options[1])
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def filter_segments(segments, quality, merge, mergegaps):
+    """Select and merge segments [start, end, quality, samplerate] sorted by start like the query method does
+
+    quality and merge are given as in a request, e.g. "D,R" and "samplerate,overlap", an empty
+    quality selects all. Segments are merged within series of the same quality and sample rate,
+    or across them when merge ignores the difference: when they are at most mergegaps seconds
+    apart, and when they overlap only with overlap. Returns new segments sorted by start, the
+    given segments are not changed.
+    """
+    qualities = quality.split(',') if quality else None
+    merge = merge.split(',') if merge else []
+    tolerance = timedelta(seconds=mergegaps)
+    series = {}  # (quality, samplerate), None where merge ignores it -> (merged segments, the one ending last)
+    for segment in segments:
+        if qualities is not None and segment[2] not in qualities:
+            continue
+        key = (None if 'quality' in merge else segment[2], None if 'samplerate' in merge else segment[3])
+        merged, last = series.get(key, ([], None))
+        if last is not None and (last[1] <= segment[0] <= last[1] + tolerance or (segment[0] < last[1] and 'overlap' in merge)):
+            last[1] = max(last[1], segment[1])
+            continue
+        segment = list(segment)
+        merged.append(segment)
+        series[key] = (merged, segment if last is None or segment[1] > last[1] else last)
+    return sorted((segment for merged, _ in series.values() for segment in merged), key=lambda segment: segment[0])
+
+
+class SegmentStore:
+    """Availability segments already downloaded for each NSLC, together with the time ranges they cover
+
+    Segments are kept separately for each set of query options (quality, mergegaps, merge,
+    includerestricted), coverage and channels are those of the options in use. The last few other
+    sets are kept aside, using their options again goes on from what they had. Coverage is kept
+    for each node and POST line pattern, so that a range is known to be fetched also for channels
+    without data in it.
+    """
+
+    def __init__(self):
+        self.options = None
+        self.coverage = {}  # (url, pattern) -> sorted disjoint [start, end] ranges
+        self.channels = {}  # NSLC key -> segments (start, end, quality, samplerate) sorted by start, tuples the garbage collector need not follow
+        self.kept = {}  # other options -> (coverage, channels), least recently used first
+
+    def use(self, options) -> None:
+        if options != self.options:
+            if self.options is not None:
+                self.kept[self.options] = (self.coverage, self.channels)
+            self.options = options
+            self.coverage, self.channels = self.kept.pop(options, ({}, {}))
+            while len(self.kept) >= KEPT_OPTIONS:
+                del self.kept[next(iter(self.kept))]
+
+    def coarser(self):
+        """mergegaps, as given, of the kept sets of options that differ from the ones in use only by a larger mergegaps"""
+        if self.options is None:
+            return []
+        others = self.options[:1] + self.options[2:]
+        return [options[1] for options in self.kept
+                if options[:1] + options[2:] == others and option_mergegaps(options) > option_mergegaps(self.options)]
+
+    def missing(self, url, pattern, start, end):
+        """Sub-ranges of start-end that have not been fetched for the pattern from the node"""
+        gaps = []
+        for covered_start, covered_end in self.coverage.get((url, pattern), []):
+            if covered_end <= start:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > start:
+                gaps.append((start, covered_start))
+            start = max(start, covered_end)
+        if start < end:
+            gaps.append((start, end))
+        return gaps
+
+    def delta(self, url, lines):
+        """POST lines asking only for what is missing of the given POST lines"""
+        delta = []
+        for line in lines:
+            if parse_line(line) is None:
+                delta.append(line)  # let the node judge it
+                continue
+            pattern, start, end = parse_line(line)
+            delta += [f"{pattern} {a.strftime('%Y-%m-%dT%H:%M:%S')} {b.strftime('%Y-%m-%dT%H:%M:%S')}" for a, b in self.missing(url, pattern, start, end)]
+        return delta
+
+    def cover(self, url, pattern, start, end) -> None:
+        end = min(end, datetime.now() - SETTLE)
+        if end <= start:
+            return
+        ranges = sorted(self.coverage.get((url, pattern), []) + [[start, end]])
+        merged = [ranges[0]]
+        for r in ranges[1:]:
+            if r[0] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], r[1])
+            else:
+                merged.append(r)
+        self.coverage[(url, pattern)] = merged
+
+    def merge(self, url, lines, received) -> None:
+        """Put the segments received for a request of the given POST lines in the store
+
+        Stored segments within the requested windows are replaced by the received ones, which are
+        clipped to the windows. Traces cut at a window boundary are joined again.
+        """
+        self.apply(url, lines, self.merged(lines, received))
+
+    def merged(self, lines, received) -> dict:
+        """Segments of the channels that merge changes, NSLC key -> segments, empty when none are left
+
+        The store itself is not changed, so this can run in a thread while the store is read.
+        """
+        windows = [window for window in map(parse_line, lines) if window is not None]
+        changed = {}
+        for key in set(received) | {k for k in list(self.channels) if any(matches(k, w[0]) for w in windows)}:
+            own = [(start, end) for pattern, start, end in windows if matches(key, pattern)]
+            if not own:
+                continue
+            segments = []
+            for segment in self.channels.get(key, []):
+                segments += self._outside(segment, own)
+            for segment in received.get(key, []):
+                for start, end in own:
+                    if segment[0] < end and segment[1] > start:
+                        segments.append((max(segment[0], start), min(segment[1], end), segment[2], segment[3]))
+            segments.sort(key=lambda s: s[0])
+            boundaries = {t for window in own for t in window}
+            joined = []
+            for segment in segments:
+                if joined and joined[-1][1] == segment[0] and segment[0] in boundaries and joined[-1][2:] == segment[2:]:
+                    joined[-1] = (joined[-1][0], segment[1]) + segment[2:]
+                else:
+                    joined.append(segment)
+            changed[key] = joined
+        return changed
+
+    def apply(self, url, lines, changed) -> None:
+        """Store the result of merged for the POST lines and mark their windows as fetched from the node"""
+        for key, segments in changed.items():
+            if segments:
+                self.channels[key] = segments
+            else:
+                self.channels.pop(key, None)
+        for pattern, start, end in filter(None, map(parse_line, lines)):
+            self.cover(url, pattern, start, end)
+
+    @staticmethod
+    def _outside(segment, windows):
+        """Parts of a segment outside all the windows"""
+        parts = [segment]
+        for start, end in windows:
+            clipped = []
+            for s in parts:
+                if s[1] <= start or s[0] >= end:
+                    clipped.append(s)
+                    continue
+                if s[0] < start:
+                    clipped.append((s[0], start) + s[2:])
+                if s[1] > end:
+                    clipped.append((end, s[1]) + s[2:])
+            parts = clipped
+        return parts
+
+    def keys(self, patterns):
+        """Stored channels selected by any of the POST line patterns"""
+        return [key for key in self.channels if any(matches(key, p) for p in patterns)]
@@ -0,0 +1,327 @@
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+
+# number of spans, i.e. characters, of a timeline when the width of the results is not known
+NUM_SPANS = 130
+# fewest spans of a timeline, however narrow the terminal is
+MIN_SPANS = 20
+# how many views (window and number of spans) the timelines are kept for
+LEVELS = 8
+# color of each quality code
+QUALITY_COLORS = {'D': 'orange1', 'R': 'green1', 'Q': 'orchid', 'M': 'turquoise4'}
+# quality codes that are drawn, and their index in the quality array of a timeline
+QUALITIES = list(QUALITY_COLORS)
+QUALITY_CODES = {q: i for i, q in enumerate(QUALITIES)}
+# line character of a span that holds a single trace, by glyph code
+GLYPHS = ['━', '┗', '┛']
+
+
+@lru_cache(maxsize=16)
+def span_timestamps(start_frame, end_frame, num_spans):
+    """Timestamp in the middle of each span, to the second as shown in the info-bar, in microseconds from the start of the frame"""
+    import numpy as np
+    span_frame = (end_frame - start_frame) / num_spans
+    return np.array([(start_frame + (i + 0.5) * span_frame).replace(microsecond=0) - start_frame for i in range(num_spans)], dtype='timedelta64[us]').astype(np.int64)
+
+
+# where the traces of a batch fall in the spans of a timeline: the spans with a trace of known
+# quality with the quality, start, end and glyph of the first one, and for every span how many
+# traces come after that first one and the start of the last of them, or the same for all traces
+TraceBins = namedtuple("TraceBins", "spans quality trace_start trace_end glyph added_after last_after added_all last_all")
+
+
+def bin_traces(start_frame, end_frame, num_spans, qualities, starts, ends):
+    """Bin traces, given as datetime64 arrays of their start and end, in the spans of a timeline
+
+    Only the arrays of the traces are used, so this can run in a worker thread while the timeline
+    is drawn. Returns a TraceBins, times in microseconds from the start of the frame, or None
+    when no trace falls in the frame.
+    """
+    import numpy as np
+    n = len(qualities)
+    if n == 0:
+        return None
+    span_us = ((end_frame - start_frame) / num_spans) // timedelta(microseconds=1)
+    frame_us = (end_frame - start_frame) // timedelta(microseconds=1)
+    codes = np.array([QUALITY_CODES.get(q, -1) for q in qualities], dtype=np.int8)
+    origin = np.datetime64(start_frame, 'us')
+    start = (starts - origin).astype(np.int64)
+    end = (ends - origin).astype(np.int64)
+    first_span = np.maximum(np.floor(start / span_us), 0).astype(np.int64)
+    last_span = np.minimum(np.ceil(end / span_us), num_spans).astype(np.int64)
+    covered = np.maximum(last_span - first_span, 0)
+    if not covered.any():
+        return None
+    # one entry for each span covered by each trace, ordered by trace
+    trace = np.repeat(np.arange(n), covered)
+    span = first_span[trace] + np.arange(len(trace)) - np.repeat(np.cumsum(covered) - covered, covered)
+    known = (codes >= 0)[trace]
+    first = np.full(num_spans, n)
+    np.minimum.at(first, span[known], trace[known])
+    spans = np.nonzero(first < n)[0]
+    t = first[spans]
+    span_start = spans * span_us
+    span_end = np.where(spans == num_spans - 1, frame_us, (spans + 1) * span_us)
+    glyph = np.where((spans == first_span[t]) & (span_start < start[t]), 1, np.where((spans == last_span[t] - 1) & (end[t] < span_end), 2, 0))
+    after = trace > first[span]
+    last_after = np.full(num_spans, -1)
+    np.maximum.at(last_after, span[after], trace[after])
+    last_all = np.full(num_spans, -1)
+    np.maximum.at(last_all, span, trace)
+    return TraceBins(spans, codes[t], start[t], end[t], glyph, np.bincount(span[after], minlength=num_spans), start[np.maximum(last_after, 0)],
+                     np.bincount(span, minlength=num_spans), start[np.maximum(last_all, 0)])
+
+
+class Timeline:
+    """The line characters and info-bar details of one NSLC
+
+    It holds a fixed number of spans, so its size does not depend on the number of traces, which
+    are added in batches as the rows of a response are parsed. Each span keeps the first trace
+    drawn in it and how many traces came after it in small numpy arrays. The styled line is built
+    from them when asked for, and the info-bar details of a span only when the cursor is on it, by
+    indexing the timeline: timeline[i] is [quality/gaps, timestamp, trace_start, trace_end, span_start, span_end].
+    """
+
+    __slots__ = ("start_frame", "end_frame", "num_spans", "span_frame", "span_us", "frame_us", "gaps", "glyph", "quality", "trace_start", "trace_end", "gap_end", "bounded", "_text", "_traces")
+
+    def __init__(self, start_frame, end_frame, num_spans):
+        import numpy as np
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.num_spans = num_spans
+        self.span_frame = (end_frame - start_frame) / num_spans
+        # times are kept as microseconds from the start of the frame
+        self.span_us = self.span_frame // timedelta(microseconds=1)
+        self.frame_us = (end_frame - start_frame) // timedelta(microseconds=1)
+        self.gaps = np.full(num_spans, -1, dtype=np.int32)  # -1 for an empty span, else the number of traces after the first one
+        self.glyph = np.zeros(num_spans, dtype=np.int8)  # index in GLYPHS of the first trace
+        self.quality = np.zeros(num_spans, dtype=np.int8)  # index in QUALITIES of the first trace
+        self.trace_start = np.zeros(num_spans, dtype=np.int64)  # first trace
+        self.trace_end = np.zeros(num_spans, dtype=np.int64)
+        self.gap_end = np.zeros(num_spans, dtype=np.int64)  # start of the last trace
+        self.bounded = False  # whether empty spans hold the start and end of their long gap in trace_start and trace_end
+        self._text = None
+        self._traces = None
+
+    @classmethod
+    def from_segments(cls, segments, start_frame, end_frame, num_spans=NUM_SPANS):
+        """Timeline of stored segments [start, end, quality, ...], clipped to the frame like the webservice does"""
+        import numpy as np
+        timeline = cls(start_frame, end_frame, num_spans)
+        segments = [segment for segment in segments if segment[1] > start_frame and segment[0] < end_frame]
+        if segments:
+            starts = np.maximum(np.array([segment[0] for segment in segments], dtype='datetime64[us]'), np.datetime64(start_frame, 'us'))
+            ends = np.minimum(np.array([segment[1] for segment in segments], dtype='datetime64[us]'), np.datetime64(end_frame, 'us'))
+            timeline.add_traces([segment[2] for segment in segments], starts, ends)
+            timeline.bound_gaps(starts, ends)
+        return timeline
+
+    def add_traces(self, qualities, starts, ends):
+        """Draw traces, given as datetime64 arrays of their start and end, in the spans they cover
+
+        The result is the same as drawing them one by one in order: the first trace with a known
+        quality in a span is drawn, any trace after it turns the span into a gap.
+        """
+        self.add_bins(bin_traces(self.start_frame, self.end_frame, self.num_spans, qualities, starts, ends))
+
+    def add_bins(self, bins):
+        """Draw traces binned by bin_traces for the frame and number of spans of this timeline"""
+        import numpy as np
+        if bins is None:
+            return
+        # spans that were empty get their first trace
+        old = self.gaps >= 0
+        fresh = ~old[bins.spans]
+        new = bins.spans[fresh]
+        self.gaps[new] = 0
+        self.quality[new] = bins.quality[fresh]
+        self.trace_start[new] = bins.trace_start[fresh]
+        self.trace_end[new] = bins.trace_end[fresh]
+        self.glyph[new] = bins.glyph[fresh]
+        # traces after the first one of a span are gaps, in spans that already had a trace all of them are
+        added = np.where(old, bins.added_all, bins.added_after)
+        gap = added > 0
+        self.gaps[gap] += added[gap]
+        self.gap_end[gap] = np.where(old, bins.last_all, bins.last_after)[gap]
+        self.bounded = False
+        self._text = None
+        self._traces = None
+
+    def bound_gaps(self, starts, ends):
+        """Find the start and end of the long gap around each empty span, given every trace of the channel
+
+        A long gap starts at the latest trace end before the timestamp of the span and ends at the
+        earliest trace start after it, found by binary search in the sorted trace ends and starts.
+        """
+        import numpy as np
+        origin = np.datetime64(self.start_frame, 'us')
+        ends = np.sort((ends - origin).astype(np.int64))
+        starts = np.sort((starts - origin).astype(np.int64))
+        empty = np.nonzero(self.gaps < 0)[0]
+        timestamps = span_timestamps(self.start_frame, self.end_frame, self.num_spans)[empty]
+        before = np.searchsorted(ends, timestamps, side='left')
+        after = np.searchsorted(starts, timestamps, side='right')
+        self.trace_start[empty] = np.where(before > 0, ends[np.maximum(before - 1, 0)], 0)
+        self.trace_end[empty] = np.where(after < len(starts), starts[np.minimum(after, len(starts) - 1)], self.frame_us)
+        self.bounded = True
+
+    @property
+    def text(self):
+        """Line characters of all spans as a rich Text, with one style span per run of traces of the same quality
+
+        It is built again only after traces were added.
+        """
+        if self._text is None:
+            from rich.text import Span, Text
+            chars = []
+            spans = []
+            run_start, run_quality = 0, None
+            for i, (gaps, glyph, quality) in enumerate(zip(self.gaps.tolist(), self.glyph.tolist(), self.quality.tolist())):
+                if gaps == 0:
+                    chars.append(GLYPHS[glyph])
+                else:
+                    chars.append(' ' if gaps < 0 else '╌' if gaps == 1 else '┄')
+                    quality = None
+                if quality != run_quality:
+                    if run_quality is not None:
+                        spans.append(Span(run_start, i, QUALITY_COLORS[QUALITIES[run_quality]]))
+                    run_start, run_quality = i, quality
+            if run_quality is not None:
+                spans.append(Span(run_start, self.num_spans, QUALITY_COLORS[QUALITIES[run_quality]]))
+            self._text = Text(''.join(chars), spans=spans)
+        return self._text
+
+    @property
+    def empty(self):
+        """Whether no trace was drawn in any span"""
+        return bool((self.gaps < 0).all())
+
+    def extent(self, earliest, latest):
+        """Line of a channel known only by the earliest and latest time of its data, while its traces are still to come"""
+        import math
+        from rich.text import Span, Text
+        first = min(max(int((earliest - self.start_frame) / self.span_frame), 0), self.num_spans)
+        last = min(max(math.ceil((latest - self.start_frame) / self.span_frame), first), self.num_spans)
+        return Text(' ' * first + '─' * (last - first) + ' ' * (self.num_spans - last), spans=[Span(first, last, 'grey50')] if last > first else [])
+
+    @property
+    def traces(self):
+        """First span and span after the last of each trace drawn in the line, as sorted lists
+
+        A trace runs over spans with a single trace and ends at a gap, an empty span, a ┛ or
+        before a ┗. Built again only after traces were added.
+        """
+        if self._traces is None:
+            import numpy as np
+            drawn = self.gaps == 0
+            first = drawn.copy()
+            first[1:] &= ~drawn[:-1] | (self.glyph[1:] == 1) | (self.glyph[:-1] == 2)
+            last = drawn.copy()
+            last[:-1] &= ~drawn[1:] | first[1:]
+            self._traces = (np.nonzero(first)[0].tolist(), (np.nonzero(last)[0] + 1).tolist())
+        return self._traces
+
+    def time(self, offset):
+        return (self.start_frame + timedelta(microseconds=int(offset))).strftime("%Y-%m-%dT%H:%M:%S")
+
+    def __len__(self):
+        return self.num_spans + 1  # because cursor can go one character after the end of the input
+
+    def __getitem__(self, i):
+        """Info-bar details of span i, formatted only now"""
+        if i >= self.num_spans:
+            return ["", "", "", "", "", ""]
+        timestamp = (self.start_frame+(i+0.5)*self.span_frame).strftime("%Y-%m-%dT%H:%M:%S")  # timestamp in the middle of the span
+        span_start = self.start_frame + i * self.span_frame
+        span_end = self.end_frame if i == self.num_spans - 1 else self.start_frame + (i + 1) * self.span_frame
+        gaps = int(self.gaps[i])
+        if gaps < 0:
+            if self.bounded:
+                return ["", timestamp, self.time(self.trace_start[i]), self.time(self.trace_end[i]), span_start, span_end]
+            return ["", timestamp, "", "", span_start, span_end]
+        if gaps == 0:
+            return [QUALITIES[self.quality[i]], timestamp, self.time(self.trace_start[i]), self.time(self.trace_end[i]), span_start, span_end]
+        # start of gaps is the end of the first trace in this span and end is the start of the last trace
+        return [str(gaps), timestamp, self.time(self.trace_end[i]), self.time(self.gap_end[i]), span_start, span_end]
+
+
+class TimelineLevels:
+    """Timelines of the channels in the results, for the time window and number of spans of the results view
+
+    Timelines are binned from the segment store only when a line is drawn, and kept for each
+    window and number of spans they were drawn at, so resizing the terminal or zooming back to
+    an earlier view shows them at once. Traces that are still arriving are drawn in the current
+    level only, the other levels drop that channel and bin it again from the store. With a
+    filter, the stored segments are selected and merged by it before they are binned.
+    """
+
+    def __init__(self, store, start_frame, end_frame, num_spans=NUM_SPANS, filter=None):
+        self.store = store  # SegmentStore of the results
+        self.filter = filter  # function of the stored segments of a channel returning the ones to draw, None for all of them
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.num_spans = num_spans
+        self.levels = {self.level: {}}  # (start_frame, end_frame, num_spans) -> NSLC key -> Timeline, least recently used first
+
+    @property
+    def level(self):
+        return self.start_frame, self.end_frame, self.num_spans
+
+    def __getitem__(self, key):
+        level = self.levels[self.level]
+        if key not in level:
+            level[key] = Timeline.from_segments(self.segments(key), self.start_frame, self.end_frame, self.num_spans)
+        return level[key]
+
+    def segments(self, key):
+        """Stored segments of the channel that are drawn"""
+        segments = self.store.channels.get(key, [])
+        return self.filter(segments) if self.filter is not None else segments
+
+    def refilter(self, filter) -> None:
+        """Draw the stored segments selected by another filter, all channels are binned again"""
+        self.filter = filter
+        self.levels = {self.level: {}}
+
+    def use(self, start_frame, end_frame, num_spans) -> bool:
+        """Show another window or number of spans, returns whether it changed"""
+        if (start_frame, end_frame, num_spans) == self.level:
+            return False
+        self.start_frame, self.end_frame, self.num_spans = start_frame, end_frame, num_spans
+        self.levels[self.level] = self.levels.pop(self.level, {})
+        while len(self.levels) > LEVELS:
+            del self.levels[next(iter(self.levels))]
+        return True
+
+    def resize(self, num_spans) -> bool:
+        return self.use(self.start_frame, self.end_frame, num_spans)
+
+    def add_rows(self, rows, level) -> None:
+        """Draw the ChannelRows of a response, binned for the given level, on top of what the store had of the channel"""
+        if level == self.level:
+            self[rows.key].add_bins(rows.bins)
+        else:
+            # the view changed while the rows were parsed
+            self[rows.key].add_traces(rows.qualities, rows.starts, rows.ends)
+        for other, timelines in self.levels.items():
+            if other != self.level:
+                timelines.pop(rows.key, None)
+
+    def bin(self, keys):
+        """Timelines of the channels binned from the store for the current level, returns the level and them
+
+        Only the store is read, so this can run in a thread, install puts them in the level afterwards.
+        """
+        level = self.level
+        return level, {key: Timeline.from_segments(self.segments(key), *level) for key in keys}
+
+    def install(self, level, timelines) -> None:
+        """Use timelines made by bin, unless the level was dropped meanwhile"""
+        if level in self.levels:
+            self.levels[level].update(timelines)
+
+    def forget(self, key) -> None:
+        """The stored segments of the channel changed, it is binned again when drawn next"""
+        for timelines in self.levels.values():
+            timelines.pop(key, None)
@@ -0,0 +1,63 @@
+import asyncio
+import inspect
+import threading
+from collections import namedtuple
+
+# seconds between two flushes of the updates, about one frame
+FRAME = 1 / 60
+
+# events posted by the workers
+StatusMessage = namedtuple("StatusMessage", "message clear")  # a line for the status log, clearing it first
+RowsParsed = namedtuple("RowsParsed", "timelines level parsed")  # ChannelRows of a part of a response, binned for level of timelines
+StoredChanged = namedtuple("StoredChanged", "timelines patterns binned")  # the store has new segments of the channels selected by the POST line patterns, (level, timelines) binned from it
+RequestFinished = namedtuple("RequestFinished", "url status_code text cached")  # an availability request is over
+ChannelExtents = namedtuple("ChannelExtents", "timelines extents")  # NSLC key -> (earliest, latest) of channels whose traces are still to come
+RestrictionInfo = namedtuple("RestrictionInfo", "restrictions")  # NSLC key -> whether it is restricted, of channels
+
+
+class UpdateBus:
+    """Updates of the user interface posted by workers, applied together once per frame
+
+    Workers on the event loop or in threads post events instead of touching widgets. The first
+    event after a flush schedules the next one a frame later on the event loop, so any number of
+    events in between cost one redraw. Handlers run in the order they are given, each with the
+    list of the events of its type that arrived since the last flush.
+    """
+
+    def __init__(self, app, handlers, interval=FRAME):
+        self.app = app
+        self.handlers = handlers  # event type -> function taking a list of events, possibly a coroutine
+        self.interval = interval
+        self.pending = []
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.loop = None
+
+    def start(self) -> None:
+        """Start flushing, called on the event loop once the application runs"""
+        self.loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.pending and not self.scheduled:
+                self.scheduled = True
+                self.loop.call_later(self.interval, self.app.call_later, self.flush)
+
+    def post(self, event) -> None:
+        """Queue an event, from any thread"""
+        with self.lock:
+            self.pending.append(event)
+            if self.scheduled or self.loop is None:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.loop.call_later, self.interval, self.app.call_later, self.flush)
+
+    async def flush(self) -> None:
+        with self.lock:
+            events, self.pending, self.scheduled = self.pending, [], False
+        batches = {kind: [] for kind in self.handlers}
+        for event in events:
+            batches[type(event)].append(event)
+        for kind, handler in self.handlers.items():
+            if batches[kind]:
+                result = handler(batches[kind])
+                if inspect.isawaitable(result):
+                    await result
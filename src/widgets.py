@@ -1,13 +1,22 @@
 from textual.widgets import Static, Input, Button, Label, Select, Checkbox, SelectionList, LoadingIndicator
-from textual.containers import Container, Horizontal, ScrollableContainer
+from textual.containers import Container, Horizontal
 from textual_autocomplete import AutoComplete, Dropdown
 from textual.app import ComposeResult
 from datetime import datetime
+from bisect import bisect_right
+from collections import deque
 import os
 from textual.suggester import Suggester
 from textual import events
+from textual.binding import Binding
+from textual.geometry import Region, Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 from rich.text import Text
-from rich.cells import get_character_cell_size
+from timeline import MIN_SPANS
+from segments import matches
+
+
 class Explanations(Static):
     """Explanations box with common key functions"""
 
@@ -98,8 +107,104 @@ class Requests(Static):
 class Status(Static):
     """Status line to show user what request is currently issued"""
 
+    def __init__(self, config, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config = config
+
     def compose(self) -> ComposeResult:
-        yield ScrollableContainer(Static(f'Welcome to Availability UI application version 1.0! 🙂\nCurrent session started at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', id="status-line"), id="status-container")
+        status_log = StatusLog(self.config["default_status_lines"], self.config["default_status_log"], id="status-line")
+        status_log.add('Welcome to Availability UI application version 1.0! 🙂')
+        status_log.add(f'Current session started at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+        yield status_log
+
+
+class StatusLog(ScrollView, can_focus=True):
+    """Status messages of the session, keeping only the last max_lines messages
+
+    Messages are kept in a ring buffer together with their lines wrapped to the width of the log.
+    Adding a message renders only that message and drops the lines of the oldest one, so it costs
+    the same however long the session has run. When a file is given, every message is also
+    appended to it as plain text with its time.
+    """
+
+    DEFAULT_CSS = """
+    StatusLog {
+        background: $surface;
+        color: $text;
+        overflow-y: scroll;
+    }
+    """
+
+    def __init__(self, max_lines, path=None, name=None, id=None, classes=None):
+        super().__init__(name=name, id=id, classes=classes)
+        self.messages = deque(maxlen=max_lines)  # Text of each message
+        self.heights = deque(maxlen=max_lines)  # number of lines of each message
+        self.lines = deque()  # Strip of each line of the messages, wrapped to wrap_width
+        self.wrap_width = 0
+        self.path = path
+        self.file = None
+
+    def add(self, message) -> None:
+        text = Text.from_markup(message)
+        if len(self.messages) == self.messages.maxlen:
+            for _ in range(self.heights[0]):
+                self.lines.popleft()
+        self.messages.append(text)
+        lines = self.wrap(text)
+        self.heights.append(len(lines))
+        self.lines.extend(lines)
+        self.virtual_size = Size(self.wrap_width, len(self.lines))
+        self.scroll_end(animate=False)
+        self.refresh()
+        if self.path:
+            try:
+                if self.file is None:
+                    self.file = open(self.path, "a")
+                self.file.write(f"{datetime.now().strftime('%Y-%m-%dT%H:%M:%S')} {Text.from_markup(message).plain}\n")
+                self.file.flush()
+            except OSError:
+                self.path = None  # the log file can't be written, messages are only shown
+
+    def wrap(self, text):
+        """Lines of a message wrapped to the width of the log, none until the log has a width"""
+        if not self.wrap_width:
+            return []
+        console = self.app.console
+        return Strip.from_lines(console.render_lines(text, console.options.update_width(self.wrap_width), pad=False))
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.heights.clear()
+        self.lines.clear()
+        self.virtual_size = Size(self.wrap_width, 0)
+        self.refresh()
+
+    def on_resize(self, event: events.Resize) -> None:
+        # the messages are wrapped again when the width changes
+        width = self.scrollable_content_region.width
+        if width == self.wrap_width:
+            return
+        self.wrap_width = width
+        self.heights.clear()
+        self.lines.clear()
+        for text in self.messages:
+            lines = self.wrap(text)
+            self.heights.append(len(lines))
+            self.lines.extend(lines)
+        self.virtual_size = Size(self.wrap_width, len(self.lines))
+        self.scroll_end(animate=False)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        if scroll_y + y >= len(self.lines):
+            return Strip.blank(width, self.rich_style)
+        return self.lines[scroll_y + y].crop_extend(scroll_x, scroll_x + width, self.rich_style).apply_style(self.rich_style)
+
+    def on_unmount(self) -> None:
+        if self.file is not None:
+            self.file.close()
 
 
 class Results(Static):
@@ -131,227 +236,351 @@ class FileSuggester(Suggester):
         return None
 
 
-class CursoredText(Input):
-    """Widget that shows a Static text with a cursor that can be moved within text content"""
+class ResultsList(ScrollView, can_focus=True):
+    """The timelines of all channels in the results, one line each with a label in front
+
+    Only the lines in view are rendered, straight from the Timeline of each channel, so that
+    thousands of channels don't put thousands of widgets in the DOM. A cursor moves within the
+    line of the selected channel, like in a text input.
+    """
 
     DEFAULT_CSS = """
-    CursoredText {
+    ResultsList {
         background: $background;
-        padding: 0 0;
-        border: none;
-        height: 1;
-    }
-    CursoredText:focus {
-        border: none;
     }
-    CursoredText>.input--cursor {
+    ResultsList > .results-list--cursor {
         background: $surface;
         color: $text;
         text-style: reverse;
     }
     """
 
-    enriched = ""
-    info = []
+    COMPONENT_CLASSES = {"results-list--cursor"}
+
+    BINDINGS = [
+        Binding("left", "cursor_left", show=False),
+        Binding("right", "cursor_right", show=False),
+        Binding("home", "home", show=False),
+        Binding("end", "end", show=False),
+        Binding("down,tab", "next_line", show=False),
+        Binding("up,shift+tab", "previous_line", show=False),
+    ]
+
+    # longest possible label to align start of lines
+    LONGEST_LABEL = 26
+    # cells in front of a timeline: label, restriction mark, padding and margin
+    LABEL_WIDTH = LONGEST_LABEL + 4
+
+    def __init__(self, timelines, name=None, id=None, classes=None):
+        super().__init__(name=name, id=id, classes=classes)
+        self.timelines = timelines  # TimelineLevels of the results, shared with the application
+        self.keys = []  # NSLC key of each line
+        self.rows = {}  # NSLC key -> line
+        self.restricted = {}  # NSLC key -> whether its data is restricted, once known
+        self.extents = {}  # NSLC key -> (earliest, latest) of its data, drawn until its traces arrive
+        self.arrived = {}  # POST line patterns whose traces are in, their channels get no extent anymore
+        self.row = 0  # line of the cursor
+        self.cursor_position = 0
+        self._strips = {}  # NSLC key -> rendered line without the cursor, until it changes
+
+    @classmethod
+    def fitting_spans(cls, width) -> int:
+        """Number of spans of the timelines that fit in a results list of the given width, next to a vertical scrollbar"""
+        return max(MIN_SPANS, width - cls.LABEL_WIDTH - 2)
+
+    def add_lines(self, keys) -> None:
+        for key in keys:
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+        self.virtual_size = Size(self.LABEL_WIDTH + self.timelines.num_spans, len(self.keys))
+        self.refresh()
+
+    def on_resize(self, event: events.Resize) -> None:
+        # timelines are drawn again as wide as the list, binned from the stored segments
+        if self.timelines.resize(self.fitting_spans(event.size.width)):
+            self.redraw()
+
+    def redraw(self) -> None:
+        """Show all lines again, after the window or number of spans of the timelines changed"""
+        self._strips = {}
+        self.cursor_position = min(self.cursor_position, self.timelines.num_spans - 1)
+        self.virtual_size = Size(self.LABEL_WIDTH + self.timelines.num_spans, len(self.keys))
+        self.refresh()
+        if self.has_focus and self.keys:
+            self.update_info_bar()
+
+    def zoom(self, factor, shift=0.0) -> None:
+        """Show a window factor times as long centered on the span under the cursor, or the same window moved by shift times its length"""
+        start_frame, end_frame = self.timelines.start_frame, self.timelines.end_frame
+        frame = end_frame - start_frame
+        if factor == 1:
+            center = start_frame + frame / 2 + shift * frame
+        else:
+            center = start_frame + (self.cursor_position + 0.5) * frame / self.timelines.num_spans
+        start = center - factor * frame / 2
+        if factor < 1:
+            # zooming in stays within the window, so that nothing has to be fetched
+            start = min(max(start, start_frame), end_frame - factor * frame)
+        start = start.replace(microsecond=0)
+        if self.app.zoom(start, start + factor * frame) and factor != 1:
+            # keep the cursor on the time it was on
+            self.set_cursor(min(max(int((center - start) / (factor * frame) * self.timelines.num_spans), 0), self.timelines.num_spans - 1))
+
+    def update_line(self, key) -> None:
+        """Show new content in the line of the channel, e.g. when more traces arrived, keeping the cursor where it is"""
+        self._strips.pop(key, None)
+        self.refresh_row(self.rows[key])
+        if self.has_focus and self.rows[key] == self.row:
+            self.update_info_bar()
+
+    def set_restrictions(self, restrictions) -> None:
+        """Show the restriction mark of the channels, given as NSLC key -> restricted, also of lines still to come"""
+        self.restricted.update(restrictions)
+        for key in restrictions:
+            self._strips.pop(key, None)
+        self.refresh()
+
+    def refresh_row(self, row) -> None:
+        y = row - self.scroll_offset.y
+        if 0 <= y < self.size.height:
+            self.refresh(Region(0, y, self.size.width, 1))
+
+    def set_extents(self, extents) -> None:
+        """Draw the extent of the channels, given as NSLC key -> (earliest, latest), until their traces arrive"""
+        extents = {key: extent for key, extent in extents.items() if not any(matches(key, p) for p in self.arrived)}
+        self.extents.update(extents)
+        for key in extents:
+            self._strips.pop(key, None)
+        self.refresh()
+
+    def drop_extents(self, patterns) -> None:
+        """Stop drawing the extent of the channels selected by the POST line patterns, once their traces are in"""
+        self.arrived.update(dict.fromkeys(patterns))
+        for key in [key for key in self.extents if any(matches(key, p) for p in patterns)]:
+            if self.extents.pop(key, None) is not None:
+                self._strips.pop(key, None)
+                if key in self.rows:
+                    self.refresh_row(self.rows[key])
+
+    def notify_style_update(self) -> None:
+        super().notify_style_update()
+        self._strips = {}
 
-    def __init__(self, value=None, info=[], name=None, id=None, classes=None, disabled=False):
-        super().__init__(value=Text.from_markup(value).plain, name=name, id=id, classes=classes, disabled=disabled)
-        self.enriched = value
-        self.info = info
+    @property
+    def key(self):
+        """NSLC key of the line with the cursor"""
+        return self.keys[self.row] if self.keys else None
 
     @property
-    def _value(self) -> Text:
-        """Value rendered as rich renderable"""
-        return Text.from_markup(self.enriched)
+    def value(self):
+        """Characters of the line with the cursor"""
+        return self.timelines[self.key].text.plain if self.keys else ""
 
     @property
-    def _cursor_at_end(self) -> bool:
-        """Flag to indicate if the cursor is at the end"""
-        return self.cursor_position >= len(self.value) - 1
+    def info(self):
+        return self.timelines[self.key] if self.keys else []
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.size.width
+        if row >= len(self.keys):
+            return Strip.blank(width, self.rich_style)
+        key = self.keys[row]
+        if row == self.row and self.has_focus:
+            strip = self.render_key(key, self.cursor_position)
+        else:
+            if key not in self._strips:
+                self._strips[key] = self.render_key(key)
+            strip = self._strips[key]
+        return strip.crop(scroll_x, scroll_x + width).extend_cell_length(width, self.rich_style)
+
+    def render_key(self, key, cursor_position=None) -> Strip:
+        """Whole line of a channel: its label, restriction mark and timeline, with the cursor if given"""
+        mark = Text("┄") if key not in self.restricted else Text("R", style="bold red1") if self.restricted[key] else Text(" ")
+        line = Text.assemble(key, " ", mark, " " * (self.LONGEST_LABEL - len(key) + 2), style=self.rich_style)
+        timeline = self.timelines[key]
+        timeline = timeline.extent(*self.extents[key]) if key in self.extents and timeline.empty else timeline.text
+        if cursor_position is not None:
+            timeline = timeline.copy()
+            timeline.stylize(self.get_component_rich_style("results-list--cursor"), cursor_position, cursor_position + 1)
+        line.append_text(timeline)
+        return Strip(line.render(self.app.console), line.cell_len)
+
+    def move_to(self, row, cursor_position=0) -> None:
+        """Put the cursor on another line, like focusing the line of a channel"""
+        if not self.keys:
+            return
+        previous = self.row
+        self.row = max(0, min(row, len(self.keys) - 1))
+        self.cursor_position = cursor_position
+        self.refresh_row(previous)
+        self.refresh_row(self.row)
+        self.scroll_to_region(Region(0, self.row, 1, 1), animate=False)
+        self.update_info_bar()
+
+    def focus_line(self, key) -> None:
+        if key in self.rows:
+            self.move_to(self.rows[key])
+            self.focus()
+
+    def set_cursor(self, cursor_position) -> None:
+        self.cursor_position = cursor_position
+        self.refresh_row(self.row)
+        self.update_info_bar()
 
     def update_info_bar(self) -> None:
         """Update info bar when cursor moves"""
-        if self.info[self.cursor_position][1]:
+        info_bar = self.app.query_one("#info-bar")
+        if not self.keys:
+            info_bar.update("")
+            return
+        info = self.info[self.cursor_position]
+        if info[1]:
             if self.value[self.cursor_position] == ' ':
-                #self.parent.parent.parent.parent.parent.query_one("#info-bar").update(f"Gap          Timestamp: {self.info[self.cursor_position][1]}     Gap start: {self.info[self.cursor_position][2]}     Gap end: {self.info[self.cursor_position][3]} ")
-                self.parent.parent.parent.parent.parent.query_one("#info-bar").update(f"Gap          Timestamp: {self.info[self.cursor_position][1]} ")
-            elif self.info[self.cursor_position][0].isdigit():
-                self.parent.parent.parent.parent.parent.query_one("#info-bar").update(f"Gaps: {self.info[self.cursor_position][0]}      Timestamp: {self.info[self.cursor_position][1]}    Gaps start: {self.info[self.cursor_position][2]}    Gaps end: {self.info[self.cursor_position][3]} ")
+                if info[2]:
+                    info_bar.update(f"Gap          Timestamp: {info[1]}     Gap start: {info[2]}     Gap end: {info[3]} ")
+                else:
+                    # gap bounds are known once the whole response is in
+                    info_bar.update(f"Gap          Timestamp: {info[1]} ")
+            elif info[0].isdigit():
+                info_bar.update(f"Gaps: {info[0]}      Timestamp: {info[1]}    Gaps start: {info[2]}    Gaps end: {info[3]} ")
             else:
-                self.parent.parent.parent.parent.parent.query_one("#info-bar").update(f"Quality: {self.info[self.cursor_position][0]}   Timestamp: {self.info[self.cursor_position][1]}   Trace start: {self.info[self.cursor_position][2]}   Trace end: {self.info[self.cursor_position][3]} ")
+                info_bar.update(f"Quality: {info[0]}   Timestamp: {info[1]}   Trace start: {info[2]}   Trace end: {info[3]} ")
         else:
-            self.parent.parent.parent.parent.parent.query_one("#info-bar").update("")
+            info_bar.update("")
 
     async def _on_key(self, event: events.Key) -> None:
-        if event.is_printable:
+        if event.is_printable and self.keys:
             # capture nslc
             if event.character == 'c':
-                nslc = self.id.split('_')[1:]
-                self.parent.parent.parent.parent.parent.parent.query_one("#network").value = str(nslc[0])
-                self.parent.parent.parent.parent.parent.parent.query_one("#station").value = str(nslc[1])
-                self.parent.parent.parent.parent.parent.parent.query_one("#location").value = str(nslc[2])
-                self.parent.parent.parent.parent.parent.parent.query_one("#channel").value = str(nslc[3])
+                nslc = self.key.split('_')
+                self.app.query_one("#network").value = str(nslc[0])
+                self.app.query_one("#station").value = str(nslc[1])
+                self.app.query_one("#location").value = str(nslc[2])
+                self.app.query_one("#channel").value = str(nslc[3])
             # capture timestamp as start time
             elif event.character == 's':
-                self.parent.parent.parent.parent.parent.parent.query_one("#start").value = self.info[self.cursor_position][1]
+                self.app.query_one("#start").value = self.info[self.cursor_position][1]
             # capture timestamp as end time
             elif event.character == 'e':
-                self.parent.parent.parent.parent.parent.parent.query_one("#end").value = self.info[self.cursor_position][1]
+                self.app.query_one("#end").value = self.info[self.cursor_position][1]
             # capture time span as start and end time
             elif event.character == 'z':
-                self.parent.parent.parent.parent.parent.parent.query_one("#start").value = self.info[self.cursor_position][4].strftime("%Y-%m-%dT%H:%M:%S")
-                self.parent.parent.parent.parent.parent.parent.query_one("#end").value = self.info[self.cursor_position][5].strftime("%Y-%m-%dT%H:%M:%S")
+                self.app.query_one("#start").value = self.info[self.cursor_position][4].strftime("%Y-%m-%dT%H:%M:%S")
+                self.app.query_one("#end").value = self.info[self.cursor_position][5].strftime("%Y-%m-%dT%H:%M:%S")
             # toggle results view
             elif event.character == 't':
-                # self.parent.parent.parent.parent = ContentSwitcher
-                self.parent.parent.parent.parent.current = "plain-container"
-                if self.parent.parent.parent.parent.parent.parent.parent.focused in self.parent.parent.query(CursoredText):
-                    active_nslc = self.parent.parent.parent.parent.parent.parent.parent.focused.id.split('_')[1:]
-                    text = self.parent.parent.parent.parent.parent.parent.parent.parent.req_text.splitlines()
-                    new_text = '\n'.join(text[:6])
-                    for row in text[5:]:
-                        parts = row.split('|')
-                        if parts:
-                            if all([p == an for (p, an) in zip(parts, active_nslc)]):
-                                new_text += '\n' + row
-                    self.parent.parent.parent.parent.query_one("#plain").update(new_text)
+                self.app.show_plain(self.key)
+            # zoom in and out around the cursor
+            elif event.character in ('+', '='):
+                self.zoom(0.5)
+            elif event.character == '-':
+                self.zoom(2)
+            # pan to earlier or later times
+            elif event.character == '[':
+                self.zoom(1, -0.25)
+            elif event.character == ']':
+                self.zoom(1, 0.25)
             # toggle help
             elif event.character == '?':
-                self.parent.parent.parent.parent.parent.parent.parent.parent.action_toggle_help()
+                self.app.action_toggle_help()
             # move to next trace
             elif event.character == 'n':
-                temp1 = self.value.find(' ', self.cursor_position)
-                temp2 = self.value.find('╌', self.cursor_position)
-                temp3 = self.value.find('┄', self.cursor_position)
-                temp4 = self.value.find('┗', self.cursor_position + 1)
-                temp5 = self.value.find('┛', self.cursor_position)
-                if max(temp1, temp2, temp3, temp4, temp5) != -1:
-                    temp = min([n for n in (temp1, temp2, temp3, temp4, temp5) if n >= 0])
-                    temp1 = self.value.find('━', temp)
-                    temp2 = self.value.find('┗', temp + 1)
-                    temp3 = self.value.find('┛', temp + 1)
-                    if max(temp1, temp2, temp3) != -1:
-                        self.cursor_position = min([n for n in (temp1, temp2, temp3) if n >= 0])
-                    else:
-                        self.parent.parent.parent.parent.parent.parent.parent.parent.next_line()
-                else:
-                    self.parent.parent.parent.parent.parent.parent.parent.parent.next_line()
-                self.update_info_bar()
+                self.next_trace()
             # move to previous trace
             elif event.character == 'p':
-                temp1 = self.value.rfind(' ', 0, self.cursor_position + 1)
-                temp2 = self.value.rfind('╌', 0, self.cursor_position + 1)
-                temp3 = self.value.rfind('┄', 0, self.cursor_position + 1)
-                temp4 = self.value.rfind('┗', 0, self.cursor_position + 1)
-                temp5 = self.value.rfind('┛', 0, self.cursor_position + 1)
-                temp = max(temp1, temp2, temp3, temp4, temp5)
-                if temp != -1:
-                    temp1 = self.value.rfind('━', 0, temp)
-                    temp2 = self.value.rfind('┗', 0, temp)
-                    temp3 = self.value.rfind('┛', 0, temp)
-                    if max(temp1, temp2, temp3) != -1:
-                        temp = max([n for n in (temp1, temp2, temp3) if n >= 0])
-                        temp1 = self.value.rfind(' ', 0, temp)
-                        temp2 = self.value.rfind('╌', 0, temp)
-                        temp3 = self.value.rfind('┄', 0, temp)
-                        temp4 = self.value.rfind('┗', 0, temp)
-                        temp5 = self.value.rfind('┛', 0, temp)
-                        temp = max(temp1, temp2, temp3, temp4, temp5)
-                        if temp == -1:
-                            self.cursor_position = 0
-                        else:
-                            self.cursor_position = temp if self.value[temp] in ['┗', '┛'] else temp + 1
-                    else:
-                        self.parent.parent.parent.parent.parent.parent.parent.parent.previous_line()
-                else:
-                    self.parent.parent.parent.parent.parent.parent.parent.parent.previous_line()
-                self.update_info_bar()
+                self.previous_trace()
             event.stop()
-            assert event.character is not None
             event.prevent_default()
 
+    def next_trace(self) -> None:
+        """Put the cursor on the start of the next trace, on a later line when there is none after the cursor"""
+        starts, _ = self.timelines[self.key].traces
+        i = bisect_right(starts, self.cursor_position)
+        if i < len(starts):
+            self.set_cursor(starts[i])
+            return
+        for row in range(self.row + 1, len(self.keys)):
+            starts, _ = self.timelines[self.keys[row]].traces
+            if starts:
+                self.move_to(row, starts[0])
+                return
+
+    def previous_trace(self) -> None:
+        """Put the cursor on the start of the trace before the one under the cursor, on an earlier line when there is none"""
+        starts, ends = self.timelines[self.key].traces
+        i = bisect_right(starts, self.cursor_position) - 1
+        if i >= 0 and self.cursor_position < ends[i]:
+            i -= 1  # the cursor is on this trace
+        if i >= 0:
+            self.set_cursor(starts[i])
+            return
+        for row in range(self.row - 1, -1, -1):
+            starts, _ = self.timelines[self.keys[row]].traces
+            if starts:
+                self.move_to(row, starts[-1])
+                return
+
     def _on_focus(self, event: events.Focus) -> None:
-        self.cursor_position = 0
-        if self.cursor_blink:
-            self._blink_timer.resume()
-        self.app.cursor_position = self.cursor_screen_offset
-        self.has_focus = True
-        self.refresh()
-        if self.parent is not None:
-            self.parent.post_message(events.DescendantFocus(self))
+        self.refresh_row(self.row)
         self.update_info_bar()
-        self.parent.parent.parent.parent.parent.parent.parent.parent.query_one("#explanations-keys").update(
-            """[gold3]ctrl+c[/gold3]: close app  [gold3]ctrl+s[/gold3]: send request  [gold3]esc[/gold3]: cancel request  [gold3]up/down/pgUp/pgDown[/gold3]: scroll up/down if in scrollable window
-            [gold3]t[/gold3]: toggle results view           [gold3]tab/shif+tab[/gold3]: jump to next/previous channel            [gold3]ctrl+t/ctrl+b[/gold3]: jump to top/bottom channel
+        self.app.query_one("#explanations-keys").update(
+            """[gold3]ctrl+c[/gold3]: close app  [gold3]ctrl+s[/gold3]: send request  [gold3]esc[/gold3]: cancel request  [gold3]pgUp/pgDown[/gold3]: scroll up/down if in scrollable window
+            [gold3]t[/gold3]: toggle results view           [gold3]up/down/tab/shif+tab[/gold3]: jump to next/previous channel    [gold3]ctrl+t/ctrl+b[/gold3]: jump to top/bottom channel
             [gold3]right/left[/gold3]: move cursor on line  [gold3]home/end[/gold3]: jump to beginning/end of line                [gold3]n/p[/gold3]: jump to next/previous trace
             [gold3]c[/gold3]: capture NSLC under cursor     [gold3]s/e[/gold3]: capture timestamp under cursor as Start/End Time  [gold3]z[/gold3]: capture time span under cursor as Start and End Time
+            [gold3]+/-[/gold3]: zoom in/out around cursor   [gold3]\\[/][/gold3]: move to earlier/later times
             Quality codes colors: [orange1][b]D[/b][/orange1] [green1][b]R[/b][/green1] [orchid][b]Q[/b][/orchid] [turquoise4][b]M[/b][/turquoise4]    Restriction policy: [i]empty[/i]/┄/[red1][b]R[/b][/red1] (open/unknown/restricted)""",
         )
-        event.prevent_default()
 
     def _on_blur(self, event: events.Blur) -> None:
-        super()._on_blur(event)
+        self.refresh_row(self.row)
         try:
-            self.parent.parent.parent.parent.parent.parent.parent.parent.query_one("#explanations-keys").update(
+            self.app.query_one("#explanations-keys").update(
                 """[gold3]ctrl+c[/gold3]: close app  [gold3]tab/shif+tab[/gold3]: cycle through options  [gold3]ctrl+s[/gold3]: send request  [gold3]esc[/gold3]: cancel request
                 [gold3]up/down/pgUp/pgDown[/gold3]: scroll up/down if in scrollable window""")
         except:
             pass
 
-    def _on_paste(self, event: events.Paste) -> None:
-        event.stop()
-        event.prevent_default()
-
     def action_cursor_right(self) -> None:
-        super().action_cursor_right()
-        if self.cursor_position >= len(self.value):
-            self.cursor_position = len(self.value) - 1
-        self.update_info_bar()
+        if self.keys:
+            self.set_cursor(min(self.cursor_position + 1, len(self.value) - 1))
 
     def action_cursor_left(self) -> None:
-        super().action_cursor_left()
-        self.update_info_bar()
+        if self.keys:
+            self.set_cursor(max(self.cursor_position - 1, 0))
 
     def action_home(self) -> None:
-        self.cursor_position = 0
-        self.update_info_bar()
+        if self.keys:
+            self.set_cursor(0)
 
     def action_end(self) -> None:
-        self.cursor_position = len(self.value) - 1
-        self.update_info_bar()
+        if self.keys:
+            self.set_cursor(len(self.value) - 1)
+
+    def action_next_line(self) -> None:
+        if self.row >= len(self.keys) - 1:
+            self.app.action_focus_next()
+        else:
+            self.move_to(self.row + 1)
+
+    def action_previous_line(self) -> None:
+        if self.row <= 0:
+            self.app.action_focus_previous()
+        else:
+            self.move_to(self.row - 1)
 
     async def _on_click(self, event: events.Click) -> None:
         offset = event.get_content_offset(self)
         if offset is None:
             return
         event.stop()
-        click_x = offset.x + self.view_position
-        cell_offset = 0
-        _cell_size = get_character_cell_size
-        for index, char in enumerate(self.value):
-            cell_width = _cell_size(char)
-            if cell_offset <= click_x < (cell_offset + cell_width):
-                self.cursor_position = index
-                break
-            cell_offset += cell_width
-        else:
-            self.cursor_position = len(self.value) - 1
-        self.update_info_bar()
-
-    def action_delete_right(self) -> None:
-        pass
-
-    def action_delete_right_word(self) -> None:
-        pass
-
-    def action_delete_right_all(self) -> None:
-        pass
-
-    def action_delete_left(self) -> None:
-        pass
-
-    def action_delete_left_word(self) -> None:
-        pass
-
-    def action_delete_left_all(self) -> None:
-        pass
+        row = offset.y + self.scroll_offset.y
+        if row >= len(self.keys):
+            return
+        self.move_to(row)
+        # timeline characters are all one cell wide
+        click_x = offset.x + self.scroll_offset.x - self.LABEL_WIDTH
+        if click_x >= 0:
+            self.set_cursor(min(click_x, len(self.value) - 1))
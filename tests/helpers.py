@@ -0,0 +1,63 @@
+import math
+import random
+from datetime import datetime, timedelta
+from geocsv import HEADER
+
+
+def geocsv(channels, rows, start, end, seed=1):
+    """A GeoCSV availability response with traces and gaps of random lengths, mostly one quality per channel"""
+    rnd = random.Random(seed)
+    total = (end - start).total_seconds()
+    out = [HEADER]
+    for c in range(channels):
+        t = start + timedelta(seconds=rnd.uniform(0, total * 0.05))
+        quality = 'DRQM'[c % 4] if c % 7 else 'D'
+        for i in range(rows):
+            if t >= end:
+                break
+            e = min(t + timedelta(seconds=rnd.expovariate(rows / total * 1.3)), end)
+            q = quality if rnd.random() > 0.1 else rnd.choice('DRQM')
+            out.append(f"XX|S{c:04d}|{'00' if c % 3 else ''}|HH{'ZNE'[c % 3]}|{q}|100.0|{t:%Y-%m-%dT%H:%M:%S.%f}Z|{e:%Y-%m-%dT%H:%M:%S.%f}Z")
+            t = e + timedelta(seconds=rnd.expovariate(rows / total * 4) if rnd.random() > 0.3 else rnd.uniform(0, total / 200))
+    return '\n'.join(out)
+
+
+def legacy_bins(response, start_frame, end_frame, num_spans=130):
+    """Characters as markup and info-bar details of each span, as show_results drew them trace by trace before the timelines were binned with numpy"""
+    span_frame = (end_frame - start_frame) / num_spans
+    lines = {}
+    infos = {}
+    for row in response.splitlines()[5:]:
+        parts = row.split('|')
+        key = f"{parts[0]}_{parts[1]}_{parts[2]}_{parts[3]}"
+        if key not in lines:
+            lines[key] = [' ' for i in range(num_spans)]
+            infos[key] = [["", "", "", "", "", ""] for i in range(num_spans)]
+            for i in range(num_spans):
+                infos[key][i][1] = (start_frame + (i + 0.5) * span_frame).strftime("%Y-%m-%dT%H:%M:%S")
+                infos[key][i][4] = start_frame + i * span_frame
+                infos[key][i][5] = end_frame if i == num_spans - 1 else start_frame + (i + 1) * span_frame
+        start_trace = datetime.strptime(parts[6], "%Y-%m-%dT%H:%M:%S.%fZ")
+        end_trace = datetime.strptime(parts[7], "%Y-%m-%dT%H:%M:%S.%fZ")
+        first_span = math.floor((start_trace - start_frame) / span_frame)
+        last_span = min(math.ceil((end_trace - start_frame) / span_frame), num_spans)
+        for i in range(first_span, last_span):
+            if lines[key][i] == ' ':
+                char = '━'
+                if i == first_span and infos[key][i][4] < start_trace:
+                    char = '┗'
+                elif i == last_span - 1 and end_trace < infos[key][i][5]:
+                    char = '┛'
+                color = {'D': 'orange1', 'R': 'green1', 'Q': 'orchid', 'M': 'turquoise4'}.get(parts[4])
+                if color:
+                    lines[key][i] = f'[{color}]{char}[/{color}]'
+                    infos[key][i] = [parts[4], infos[key][i][1], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), end_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
+            elif any(c in lines[key][i] for c in ['━', '┗', '┛']):
+                lines[key][i] = '╌'
+                infos[key][i] = ['1', infos[key][i][1], infos[key][i][3], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
+            elif lines[key][i] == '╌' or lines[key][i] == '┄':
+                lines[key][i] = '┄'
+                infos[key][i] = [str(int(infos[key][i][0]) + 1), infos[key][i][1], infos[key][i][2], start_trace.strftime("%Y-%m-%dT%H:%M:%S"), infos[key][i][4], infos[key][i][5]]
+    for key in lines:
+        infos[key].append(["", "", "", "", "", ""])
+    return {key: ''.join(line) for key, line in lines.items()}, infos
@@ -0,0 +1,177 @@
+"""Timing comparisons with the code paths they replaced, run with pytest -m benchmark"""
+import asyncio
+import shutil
+import ssl
+import subprocess
+import threading
+import time
+from datetime import datetime
+import pytest
+from helpers import geocsv, legacy_bins
+
+pytestmark = pytest.mark.benchmark
+
+
+def best_of(runs, function, *args):
+    """Shortest wall time of a few runs of function, in seconds"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def test_numpy_binning_of_100k_rows():
+    from results import parse_rows
+    from geocsv import GeoCSVReader
+    start_frame, end_frame = datetime(2024, 1, 1), datetime(2025, 1, 1)
+    response = geocsv(150, 3000, start_frame, end_frame, seed=9)
+    lines = response.splitlines()
+    assert len(lines) > 100000
+
+    def binned():
+        # parts of 5000 lines, as they are handed over while the response downloads
+        reader = GeoCSVReader()
+        for i in range(0, len(lines), 5000):
+            parse_rows(reader, lines[i:i + 5000], (start_frame, end_frame, 130))
+
+    legacy = best_of(1, legacy_bins, response, start_frame, end_frame)
+    numpy = best_of(3, binned)
+    print(f"\n{len(lines)} rows: per trace loop {legacy:.2f}s, numpy {numpy:.2f}s, {legacy / numpy:.1f}x")
+    assert numpy * 3 < legacy
+
+
+def test_redraw_of_1000_rows():
+    from rich.text import Text
+    from textual.app import App
+    from textual.strip import Strip
+    from geocsv import GeoCSVReader
+    from results import parse_rows
+    from segments import SegmentStore
+    from timeline import TimelineLevels
+    from widgets import ResultsList
+    start_frame, end_frame = datetime(2025, 1, 1), datetime(2025, 1, 8)
+    response = geocsv(1000, 40, start_frame, end_frame, seed=2)
+    markup, _ = legacy_bins(response, start_frame, end_frame)
+    store = SegmentStore()
+    store.use(("", "1.0", "", True))
+    parsed = parse_rows(GeoCSVReader(), response.splitlines(), (start_frame, end_frame, 130))
+    store.merge("url", ["* * * * 2025-01-01T00:00:00 2025-01-08T00:00:00"], {rows.key: rows.segments for rows in parsed})
+    levels = TimelineLevels(store, start_frame, end_frame, 130)
+    keys = [rows.key for rows in parsed]
+    assert len(keys) == 1000
+
+    class Results(App):
+        AUTO_FOCUS = None  # the info-bar of the focused line is not part of this app
+
+        def compose(self):
+            yield ResultsList(levels)
+
+    async def measure():
+        app = Results()
+        async with app.run_test(size=(170, 1000)) as pilot:
+            results = app.query_one(ResultsList)
+            results.add_lines(keys)
+            await pilot.pause()
+
+            def legacy():
+                # markup of each line parsed again on every render
+                for key in keys:
+                    line = Text.from_markup(markup[key])
+                    Strip(line.render(app.console), line.cell_len)
+
+            def redraw():
+                for y in range(len(keys)):
+                    results.render_line(y)
+
+            results.redraw()
+            first = best_of(1, redraw)
+            return best_of(3, legacy), first, best_of(3, redraw)
+
+    legacy, first, again = asyncio.run(measure())
+    print(f"\n1000 rows: markup parsed on each render {legacy * 1000:.1f}ms, render after a change {first * 1000:.1f}ms, redraw {again * 1000:.1f}ms")
+    assert again * 10 < legacy
+
+
+CERTIFICATE = ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"]
+
+
+@pytest.fixture
+def tls_node(tmp_path):
+    """A node on localhost over TLS taking 50 ms to answer and handling at most 8 requests at a time, like a busy data centre
+
+    Yields its query URL, the file of its certificate and the set of client addresses it saw.
+    """
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is needed for a certificate")
+    from aiohttp import web
+    key, certificate = str(tmp_path / "key.pem"), str(tmp_path / "certificate.pem")
+    subprocess.run(CERTIFICATE + ["-keyout", key, "-out", certificate], check=True, capture_output=True)
+    peers = set()
+    started = threading.Event()
+    port = []
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        workers = asyncio.Semaphore(8)
+
+        async def query(request):
+            peers.add(request.transport.get_extra_info("peername"))
+            await request.read()
+            async with workers:
+                await asyncio.sleep(0.05)
+            return web.Response(text=geocsv(1, 20, datetime(2025, 1, 1), datetime(2025, 1, 2)))
+
+        app = web.Application()
+        app.router.add_post("/fdsnws/availability/1/query", query)
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(certificate, key)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+        loop.run_until_complete(site.start())
+        port.append(site._server.sockets[0].getsockname()[1])
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    yield f"https://127.0.0.1:{port[0]}/fdsnws/availability/1/query", certificate, peers
+
+
+def test_fetch_engine_against_a_thread_per_batch(tls_node):
+    import aiohttp
+    import requests
+    from fetch import FetchEngine
+    url, certificate, peers = tls_node
+    batches = [f"XX S{i:04d} * * 2025-01-01T00:00:00 2025-01-02T00:00:00" for i in range(300)]
+
+    def threads():
+        # one thread and one requests.post for each batch, as the batches were sent before
+        statuses = []
+        workers = [threading.Thread(target=lambda body: statuses.append(requests.post(url, data=body, verify=certificate).status_code), args=(body,)) for body in batches]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return statuses
+
+    async def engine():
+        fetcher = FetchEngine()
+        connector = aiohttp.TCPConnector(limit=fetcher.total, limit_per_host=fetcher.per_node, ssl=ssl.create_default_context(cafile=certificate))
+        fetcher._session = aiohttp.ClientSession(connector=connector)
+        responses = await asyncio.gather(*(fetcher.post(url, body) for body in batches))
+        await fetcher.close()
+        return [r.status_code for r in responses]
+
+    started = time.perf_counter()
+    assert threads() == [200] * len(batches)
+    threaded, threaded_sockets = time.perf_counter() - started, len(peers)
+    peers.clear()
+    started = time.perf_counter()
+    assert asyncio.run(engine()) == [200] * len(batches)
+    pooled, pooled_sockets = time.perf_counter() - started, len(peers)
+    print(f"\n{len(batches)} batches: threads {threaded:.2f}s {threaded_sockets} sockets, FetchEngine {pooled:.2f}s {pooled_sockets} sockets")
+    assert pooled_sockets <= FetchEngine().per_node < threaded_sockets
+    assert pooled < threaded
@@ -0,0 +1,76 @@
+import os
+import time
+from cache import CompressedLines, ResponseCache, RestrictionCache, normalize_body
+
+URL = "https://a.example/fdsnws/availability/1/query"
+BODY = "quality=D\nXX * * * 2020-01-01T00:00:00 2020-01-02T00:00:00\nYY * * * 2020-01-01T00:00:00 2020-01-02T00:00:00"
+
+
+def cache(tmp_path, max_bytes=1024 * 1024, ttl=3600):
+    return ResponseCache(ttl, ttl, max_bytes, path=str(tmp_path / "responses.sqlite"))
+
+
+def test_equivalent_bodies_share_an_entry(tmp_path):
+    responses = cache(tmp_path)
+    responses.put(URL, BODY, 200, "a\nb")
+    shuffled = "\n".join(reversed(BODY.splitlines())).replace(" * ", "  *  ") + "\n\n"
+    assert normalize_body(shuffled) == normalize_body(BODY)
+    assert responses.get(URL, shuffled) == (200, "a\nb")
+    assert responses.get(URL.replace("a.", "b."), BODY) is None
+
+
+def test_lines_are_compressed_as_they_arrive(tmp_path):
+    responses = cache(tmp_path)
+    lines = [f"XX|S{i:04d}||HHZ|D|100.0|2020-01-01T00:00:00.000000Z|2020-01-02T00:00:00.000000Z" for i in range(20000)]
+    compressed = responses.compressor()
+    for i in range(0, len(lines), 333):
+        compressed.add(lines[i:i + 333])
+    responses.put_lines(URL, BODY, 200, compressed)
+    assert responses.get_lines(URL, BODY) == (200, lines)
+    assert responses.get(URL, BODY) == (200, "\n".join(lines) + "\n")
+
+
+def test_responses_over_the_entry_cap_are_dropped(tmp_path):
+    responses = cache(tmp_path, max_bytes=40 * 1024)
+    compressed = responses.compressor()
+    assert compressed.limit == responses.max_entry == 10 * 1024
+    for i in range(200):
+        compressed.add([f"{i} {j} {time.time_ns()}" for j in range(50)])
+    assert compressed.parts is None
+    responses.put_lines(URL, BODY, 200, compressed)
+    assert responses.get_lines(URL, BODY) is None
+    small = CompressedLines(1024)
+    small.add(["a"])
+    assert small.finish() is not None
+
+
+def test_disabled_and_expired(tmp_path):
+    disabled = ResponseCache(3600, 3600, 0)
+    assert disabled.db is None and disabled.compressor() is None
+    disabled.put(URL, BODY, 200, "a")
+    assert disabled.get(URL, BODY) is None
+    expired = cache(tmp_path, ttl=-1)
+    expired.put(URL, BODY, 200, "a")
+    assert expired.get(URL, BODY) is None
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    responses = cache(tmp_path, max_bytes=8 * 1024)
+    texts = {n: os.urandom(800).hex() for n in range(10)}
+    for n, text in texts.items():
+        responses.put(URL, f"XX S{n} * * 2020-01-01T00:00:00 2020-01-02T00:00:00", 200, text)
+        if n == 1:
+            assert responses.get(URL, "XX S0 * * 2020-01-01T00:00:00 2020-01-02T00:00:00") == (200, texts[0])
+    assert responses.get(URL, "XX S0 * * 2020-01-01T00:00:00 2020-01-02T00:00:00") is not None
+    assert responses.get(URL, "XX S1 * * 2020-01-01T00:00:00 2020-01-02T00:00:00") is None
+    assert responses.get(URL, "XX S9 * * 2020-01-01T00:00:00 2020-01-02T00:00:00") == (200, texts[9])
+
+
+def test_restrictions_expire():
+    restrictions = RestrictionCache(3600)
+    restrictions.update({"XX_STA_00_HHZ": True, "XX_STA_00_HHN": False})
+    assert restrictions.known(["XX_STA_00_HHZ", "XX_OTHER_00_HHZ"]) == {"XX_STA_00_HHZ": True}
+    assert restrictions.known() == {"XX_STA_00_HHZ": True, "XX_STA_00_HHN": False}
+    expired = RestrictionCache(-1)
+    expired.update({"XX_STA_00_HHZ": True})
+    assert expired.known() == {}
@@ -0,0 +1,41 @@
+from inventory import Inventory, PrefixTrie
+
+CODES = ["HHE", "HHN", "HHZ", "HNZ", "BHZ", "LHZ", "H"]
+
+
+def test_complete_prefix():
+    trie = PrefixTrie(CODES)
+    assert trie.complete("HH") == ["HHE", "HHN", "HHZ"]
+    assert trie.complete("H") == ["H", "HHE", "HHN", "HHZ", "HNZ"]
+    assert trie.complete("") == sorted(CODES)
+    assert trie.complete("X") == []
+
+
+def test_complete_wildcards():
+    trie = PrefixTrie(CODES)
+    assert trie.complete("?HZ") == ["BHZ", "HHZ", "LHZ"]
+    assert trie.complete("H?Z") == ["HHZ", "HNZ"]
+    assert trie.complete("*Z") == ["BHZ", "HHZ", "HNZ", "LHZ"]
+    assert trie.complete("*") == sorted(CODES)
+    assert trie.complete("H*E") == ["HHE"]
+
+
+def test_complete_limit():
+    trie = PrefixTrie(f"S{i:03d}" for i in range(100))
+    assert trie.complete("S", limit=5) == ["S000", "S001", "S002", "S003", "S004"]
+    assert len(trie.complete("S0*", limit=7)) == 7
+
+
+def test_network_fetched_in_parts(tmp_path):
+    inventory = Inventory(str(tmp_path / "inventory.json"))
+    inventory.add_channels([["XX", "OLD", "", "HHZ"]])
+    inventory.network_fetched("XX")
+    inventory.reset_network("XX")
+    assert not inventory.fresh("XX")
+    inventory.add_channels([["XX", "A", "", "HHZ"], ["XX", "A", "00", "HHN"]])
+    inventory.add_channels([["XX", "B", "", "HHZ"]])
+    assert not inventory.fresh("XX")
+    inventory.network_fetched("XX")
+    assert inventory.fresh("XX")
+    assert inventory.complete("station", "", net="XX") == ["A", "B"]
+    assert inventory.complete("location", "", net="XX", sta="A") == ["--", "00"]
@@ -0,0 +1,41 @@
+from routing import RoutingTable
+
+A = "https://a.example/fdsnws/availability/1/query"
+B = "https://b.example/fdsnws/availability/1/query"
+
+
+def table(tmp_path, *entries):
+    """A routing table of the availability service with the given (url, params) entries"""
+    routes = RoutingTable("https://routing.example/query?", path=str(tmp_path / "routing.json"))
+    routes.build(0.0, {"availability": [{"url": url, "params": params} for url, params in entries]})
+    return routes
+
+
+def test_miss_without_table_or_route(tmp_path):
+    assert RoutingTable("https://routing.example/query?", path=str(tmp_path / "routing.json")).resolve("availability", net="XX") is None
+    routes = table(tmp_path, (A, [{"net": "XX", "sta": "*", "loc": "*", "cha": "*", "start": "2000-01-01T00:00:00", "end": ""}]))
+    assert routes.resolve("availability", net="YY") is None
+    assert routes.resolve("station", net="XX") is None
+
+
+def test_post_lines_are_clipped_to_the_routes(tmp_path):
+    routes = table(tmp_path,
+                   (A, [{"net": "XX", "sta": "*", "loc": "*", "cha": "*", "start": "2000-01-01T00:00:00", "end": "2020-01-01T00:00:00"}]),
+                   (B, [{"net": "XX", "sta": "*", "loc": "*", "cha": "*", "start": "2020-01-01T00:00:00", "end": ""}]))
+    assert routes.resolve("availability", net="XX", sta="STA", cha="HH?", start="2019-06-01T00:00:00", end="2021-01-01T00:00:00") == (
+        f"{A}\nXX STA * HH? 2019-06-01T00:00:00 2020-01-01T00:00:00\n\n"
+        f"{B}\nXX STA * HH? 2020-01-01T00:00:00 2021-01-01T00:00:00\n")
+    assert routes.resolve("availability", net="XX", loc="--", start="2021-01-01T00:00:00") == f"{B}\nXX * -- * 2021-01-01T00:00:00 2200-12-31T00:00:00\n"
+
+
+def test_best_priority_is_chosen_per_stream(tmp_path):
+    routes = table(tmp_path,
+                   (A, [{"net": "XX", "sta": "*", "loc": "*", "cha": "*", "priority": 1},
+                        {"net": "YY", "sta": "*", "loc": "*", "cha": "*", "priority": 2}]),
+                   (B, [{"net": "XX", "sta": "*", "loc": "*", "cha": "*", "priority": 2},
+                        {"net": "YY", "sta": "*", "loc": "*", "cha": "*", "priority": 1}]))
+    assert routes.resolve("availability", net="XX") == f"{A}\nXX * * * 1800-01-01T00:00:00 2200-12-31T00:00:00\n"
+    # a wildcard selects streams of both networks, each goes to its own primary node
+    assert routes.resolve("availability", net="*") == (
+        f"{A}\nXX * * * 1800-01-01T00:00:00 2200-12-31T00:00:00\n\n"
+        f"{B}\nYY * * * 1800-01-01T00:00:00 2200-12-31T00:00:00\n")
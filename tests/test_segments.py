@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from segments import SegmentStore, filter_segments, matches, option_mergegaps, parse_line
+
+OPTIONS = ("D,R,Q,M", "1.0", "overlap", True)
+
+
+def t(hour, day=1):
+    return datetime(2025, 1, day, hour)
+
+
+def line(pattern, start, end):
+    return f"{pattern} {start:%Y-%m-%dT%H:%M:%S} {end:%Y-%m-%dT%H:%M:%S}"
+
+
+def store(*merges):
+    """A store for OPTIONS after merging (url, lines, received) one after the other"""
+    segments = SegmentStore()
+    segments.use(OPTIONS)
+    for url, lines, received in merges:
+        segments.merge(url, lines, received)
+    return segments
+
+
+def test_parse_line_and_matches():
+    assert parse_line("XX STA -- HH? 2025-01-01T00:00:00 2025-01-02T00:00:00Z") == ("XX STA -- HH?", t(0), t(0, 2))
+    assert parse_line("quality=D") is None
+    assert matches("XX_STA__HHZ", "XX STA -- HH?")
+    assert matches("XX_STA_00_HHZ", "XX * * *")
+    assert not matches("XX_STA_00_HHZ", "XX STA -- HH?")
+    assert not matches("XY_STA_00_HHZ", "XX * * *")
+
+
+def test_delta_asks_only_for_missing_ranges():
+    segments = store(("a", [line("XX * * *", t(6), t(12))], {}))
+    assert segments.missing("a", "XX * * *", t(0), t(18)) == [(t(0), t(6)), (t(12), t(18))]
+    assert segments.delta("a", [line("XX * * *", t(0), t(18))]) == [line("XX * * *", t(0), t(6)), line("XX * * *", t(12), t(18))]
+    assert segments.delta("a", [line("XX * * *", t(7), t(11))]) == []
+    # coverage is per node and pattern, lines without a window are left to the node
+    assert segments.delta("b", [line("XX * * *", t(7), t(11))]) == [line("XX * * *", t(7), t(11))]
+    assert segments.delta("a", [line("XX STA * *", t(7), t(11)), "quality=D"]) == [line("XX STA * *", t(7), t(11)), "quality=D"]
+
+
+def test_recent_data_is_fetched_again():
+    now = datetime.now().replace(microsecond=0)
+    segments = store(("a", [line("XX * * *", now - timedelta(hours=2), now)], {}))
+    assert segments.delta("a", [line("XX * * *", now - timedelta(hours=1), now)])
+    assert not segments.delta("a", [line("XX * * *", now - timedelta(hours=2), now - timedelta(hours=1))])
+
+
+def test_merge_replaces_the_requested_windows_and_joins_cut_traces():
+    key = "XX_STA_00_HHZ"
+    segments = store(
+        ("a", [line("XX * * *", t(0), t(12))], {key: [(t(1), t(5), 'D', 100.0), (t(10), t(14), 'D', 100.0)]}),
+        ("a", [line("XX * * *", t(12), t(20))], {key: [(t(10), t(15), 'D', 100.0), (t(16), t(17), 'M', 100.0)]}),
+    )
+    # the trace cut at 12:00 by the first window is joined with its continuation
+    assert segments.channels[key] == [(t(1), t(5), 'D', 100.0), (t(10), t(15), 'D', 100.0), (t(16), t(17), 'M', 100.0)]
+    assert segments.coverage[("a", "XX * * *")] == [[t(0), t(20)]]
+    # fetching a window again drops what is no longer there
+    segments.merge("a", [line("XX STA * *", t(0), t(6))], {})
+    assert segments.channels[key] == [(t(10), t(15), 'D', 100.0), (t(16), t(17), 'M', 100.0)]
+    segments.merge("a", [line("XX STA * *", t(6), t(20))], {})
+    assert key not in segments.channels
+    assert segments.keys(["XX * * *"]) == []
+
+
+def test_merged_does_not_change_the_store():
+    key = "XX_STA_00_HHZ"
+    segments = store(("a", [line("XX * * *", t(0), t(12))], {key: [(t(1), t(5), 'D', 100.0)]}))
+    changed = segments.merged([line("XX * * *", t(0), t(12))], {})
+    assert changed == {key: []}
+    assert segments.channels[key] == [(t(1), t(5), 'D', 100.0)]
+    segments.apply("a", [line("XX * * *", t(0), t(12))], changed)
+    assert key not in segments.channels
+
+
+def test_other_options_are_kept_aside():
+    key = "XX_STA_00_HHZ"
+    segments = store(("a", [line("XX * * *", t(0), t(12))], {key: [(t(1), t(5), 'D', 100.0)]}))
+    fine = OPTIONS[:1] + ("0.0",) + OPTIONS[2:]
+    segments.use(fine)
+    assert segments.channels == {} and segments.delta("a", [line("XX * * *", t(0), t(12))])
+    assert segments.coarser() == ["1.0"]
+    segments.use(OPTIONS)
+    assert segments.channels[key] == [(t(1), t(5), 'D', 100.0)]
+    assert segments.coarser() == []
+    assert option_mergegaps(fine) == 0.0 and option_mergegaps(("", "", "", True)) == 0.0 and option_mergegaps(None) == 0.0
+
+
+def test_filter_segments_merges_within_quality_series():
+    segments = [(t(0), t(2), 'D', 100.0), (t(1), t(3), 'M', 100.0), (t(2), t(4), 'D', 100.0)]
+    # the M trace in between does not break the D series
+    assert filter_segments(segments, "", "", 0) == [[t(0), t(4), 'D', 100.0], [t(1), t(3), 'M', 100.0]]
+    assert filter_segments(segments, "D", "", 0) == [[t(0), t(4), 'D', 100.0]]
+    # overlaps are merged across qualities only when quality is merged too
+    assert filter_segments(segments, "", "quality,overlap", 0) == [[t(0), t(4), 'D', 100.0]]
+    assert filter_segments(segments, "", "quality", 0) == [[t(0), t(2), 'D', 100.0], [t(1), t(3), 'M', 100.0], [t(2), t(4), 'D', 100.0]]
+    assert segments[0] == (t(0), t(2), 'D', 100.0)
+
+
+def test_filter_segments_mergegaps_and_samplerates():
+    segments = [(t(0), t(1), 'D', 100.0), (t(2), t(3), 'D', 100.0), (t(3), t(4), 'D', 50.0)]
+    assert filter_segments(segments, "", "", 3600) == [[t(0), t(3), 'D', 100.0], [t(3), t(4), 'D', 50.0]]
+    assert filter_segments(segments, "", "samplerate", 3600) == [[t(0), t(4), 'D', 100.0]]
+    assert filter_segments(segments, "", "samplerate", 0) == [[t(0), t(1), 'D', 100.0], [t(2), t(4), 'D', 100.0]]
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+# seconds that importing the modules the entry point needs before the first frame may take
+IMPORT_BUDGET = 1.0
+# seconds from constructing the application until its first frame, with nodes that do not answer
+FIRST_FRAME_BUDGET = 3.0
+# modules that are only imported with their first use, after the first frame
+LAZY = ["aiohttp", "requests", "numpy"]
+
+
+def import_times(code):
+    """Cumulative import time in seconds of each top level module imported by code in a fresh interpreter, and all modules it imported"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code + "; import sys; print(' '.join(sys.modules))"],
+                            cwd=SRC, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        found = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$", line)
+        if found:
+            times[found.group(2)] = int(found.group(1)) / 1e6
+    return times, result.stdout.split()
+
+
+def test_import_budget():
+    times, modules = import_times("import main, app")
+    assert times["main"] + times["app"] < IMPORT_BUDGET, f"importing main and app took {times['main'] + times['app']:.3f}s"
+    assert [module for module in LAZY if module in modules] == []
+
+
+def test_main_does_not_import_textual():
+    times, modules = import_times("import main")
+    assert "textual" not in modules
+
+
+@pytest.fixture
+def silent_server():
+    """URL of a server that accepts connections and never answers"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/"
+    server.close()
+
+
+def test_first_frame_does_not_wait_for_the_network(tmp_path, monkeypatch, silent_server):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.chdir(SRC)
+    import nodes
+    monkeypatch.setattr(nodes, "NODES_URL", silent_server + "epb/nodes")
+    from main import load_defaults, load_nodes
+
+    async def first_frame():
+        from app import AvailabilityUI
+        started = time.perf_counter()
+        app = AvailabilityUI(nodes_urls=load_nodes(), routing=silent_server + "query?", **load_defaults())
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            elapsed = time.perf_counter() - started
+            assert app.query("#nodes")
+        return elapsed
+
+    elapsed = asyncio.run(first_frame())
+    assert elapsed < FIRST_FRAME_BUDGET, f"first frame after {elapsed:.2f}s"
@@ -0,0 +1,96 @@
+import io
+from datetime import datetime
+import numpy as np
+import pytest
+from rich.console import Console
+from rich.text import Text
+from geocsv import GeoCSVReader
+from helpers import geocsv, legacy_bins
+from timeline import NUM_SPANS, Timeline, TimelineLevels
+from segments import SegmentStore
+
+WINDOWS = [
+    (20, 50, datetime(2025, 1, 1), datetime(2025, 1, 8)),
+    (30, 2000, datetime(2025, 1, 1), datetime(2025, 1, 8)),
+    (10, 3, datetime(2025, 1, 1), datetime(2025, 1, 8)),
+    (50, 300, datetime(2024, 1, 1), datetime(2025, 1, 1, 3, 7, 11)),
+]
+
+
+def binned(response, start_frame, end_frame, chunk=None):
+    """Timelines of a response, with its rows added a chunk at a time like they arrive"""
+    timelines = {}
+    lines = response.splitlines()
+    reader = GeoCSVReader()
+    chunk = chunk or len(lines)
+    for c in range(0, len(lines), chunk):
+        columns = {}
+        for parts in reader.rows(lines[c:c + chunk]):
+            qualities, starts, ends = columns.setdefault(f"{parts[0]}_{parts[1]}_{parts[2]}_{parts[3]}", ([], [], []))
+            qualities.append(parts[4])
+            starts.append(parts[6].rstrip('Z'))
+            ends.append(parts[7].rstrip('Z'))
+        for key, (qualities, starts, ends) in columns.items():
+            timeline = timelines.setdefault(key, Timeline(start_frame, end_frame, NUM_SPANS))
+            timeline.add_traces(qualities, np.array(starts, dtype='datetime64[us]'), np.array(ends, dtype='datetime64[us]'))
+    return timelines
+
+
+def styles(text):
+    console = Console(file=io.StringIO(), width=300)
+    return [str(text.get_style_at_offset(console, i)) for i in range(len(text))]
+
+
+@pytest.mark.parametrize("seed", range(len(WINDOWS)))
+@pytest.mark.parametrize("chunk", [None, 37, 3])
+def test_bins_like_the_legacy_loop(seed, chunk):
+    channels, rows, start_frame, end_frame = WINDOWS[seed]
+    response = geocsv(channels, rows, start_frame, end_frame, seed=seed)
+    lines, infos = legacy_bins(response, start_frame, end_frame)
+    timelines = binned(response, start_frame, end_frame, chunk)
+    assert set(timelines) == set(lines)
+    for key, markup in lines.items():
+        legacy = Text.from_markup(markup)
+        assert timelines[key].text.plain == legacy.plain
+        assert styles(timelines[key].text) == styles(legacy)
+        assert [timelines[key][i] for i in range(len(timelines[key]))] == infos[key]
+
+
+def test_unknown_qualities_turn_later_traces_into_gaps_only():
+    start_frame, end_frame = datetime(2025, 1, 1), datetime(2025, 1, 8)
+    rows = geocsv(40, 400, start_frame, end_frame, seed=3).splitlines()
+    for n in range(5, len(rows), 5):
+        parts = rows[n].split('|')
+        parts[4] = 'X'
+        rows[n] = '|'.join(parts)
+    response = '\n'.join(rows)
+    lines, infos = legacy_bins(response, start_frame, end_frame)
+    for chunk in (None, 13):
+        timelines = binned(response, start_frame, end_frame, chunk)
+        for key, markup in lines.items():
+            assert timelines[key].text.plain == Text.from_markup(markup).plain
+            assert [timelines[key][i] for i in range(len(timelines[key]))] == infos[key]
+
+
+def test_from_segments_clips_to_the_frame():
+    start_frame, end_frame = datetime(2025, 1, 1), datetime(2025, 1, 2)
+    segments = [(datetime(2024, 12, 31), datetime(2025, 1, 1, 6), 'D', 100.0), (datetime(2025, 1, 1, 12), datetime(2025, 1, 3), 'R', 100.0)]
+    timeline = Timeline.from_segments(segments, start_frame, end_frame, 24)
+    assert timeline.text.plain == '━' * 6 + ' ' * 6 + '━' * 12
+    assert timeline[0][2] == "2025-01-01T00:00:00"
+    assert timeline[23][3] == "2025-01-02T00:00:00"
+
+
+def test_levels_bin_from_the_store_and_keep_earlier_windows():
+    store = SegmentStore()
+    store.use(("", "1.0", "", True))
+    store.merge("url", ["XX STA 00 HHZ 2025-01-01T00:00:00 2025-01-02T00:00:00"], {"XX_STA_00_HHZ": [(datetime(2025, 1, 1, 6), datetime(2025, 1, 1, 18), 'D', 100.0)]})
+    levels = TimelineLevels(store, datetime(2025, 1, 1), datetime(2025, 1, 2), 24)
+    day = levels["XX_STA_00_HHZ"]
+    assert day.text.plain == ' ' * 6 + '━' * 12 + ' ' * 6
+    levels.use(datetime(2025, 1, 1, 6), datetime(2025, 1, 1, 18), 24)
+    assert levels["XX_STA_00_HHZ"].text.plain == '━' * 24
+    levels.use(datetime(2025, 1, 1), datetime(2025, 1, 2), 24)
+    assert levels["XX_STA_00_HHZ"] is day
+    level, timelines = levels.bin(["XX_STA_00_HHZ"])
+    assert level == levels.level and timelines["XX_STA_00_HHZ"].text.plain == day.text.plain